@@ -0,0 +1,325 @@
+# -*- coding: utf-8 -*-
+"""
+CharacterBatch, a whole roster of characters stored as NumPy columns.
+
+Needs NumPy, unlike the rest of the builder.
+
+@author: auto-nom
+"""
+
+import rpgSystem as rs
+import rpgDice as rd
+
+
+def _tables():
+    """
+    NumPy versions of the ruleset data the batch operations need, worked
+    out once per ruleset.
+    """
+    rules = rs.rules
+    try:
+        return rules.derived["batchTables"]
+    except KeyError:
+        pass
+
+    np = rd.numpy()
+    attributes = rules.Attributes
+    tables = {}
+    # Which scorelist index each role puts in each attribute
+    tables["priority"] = np.array(
+        [[rules.RoleStats[role][a + "Priority"] for a in attributes]
+         for role in rules.Roles], dtype=np.intp)
+    # Racial bonus to each attribute
+    tables["bonus"] = np.array(
+        [[rules.RaceStats[race][a + "Bonus"] for a in attributes]
+         for race in rules.Races], dtype=np.int8)
+    # Bonuses to randomly chosen scores for each race, like Half-Elves get
+    tables["randomBonuses"] = [
+        tuple(rules.RaceStats[race].get("Random Bonuses", ()))
+        for race in rules.Races]
+    # Each different hit die, compiled, and which of them each role uses
+    hitDice = [rd.compile_roll(rules.RoleStats[role]["Hit Die"])
+               for role in rules.Roles]
+    tables["hitDice"] = list(dict.fromkeys(hitDice))
+    tables["hitDie"] = np.array([tables["hitDice"].index(d) for d in hitDice],
+                                dtype=np.intp)
+    # Proficiency bonus of each role at each level, from its RoleProgression
+    progressions = [rs.role_progression(role) for role in rules.Roles]
+    maxLevel = max(p.maxLevel for p in progressions)
+    tables["maxLevel"] = np.array([p.maxLevel for p in progressions],
+                                  dtype=np.int16)
+    tables["proficiencyBonus"] = np.zeros((len(progressions), maxLevel + 1),
+                                          dtype=np.int8)
+    for i, p in enumerate(progressions):
+        tables["proficiencyBonus"][i, 1:p.maxLevel + 1] = \
+            p.proficiencyBonus[1:]
+    # Attribute index for each skill, in the order of rules.Skills
+    tables["skillAttribs"] = np.array(
+        [rules.AttributeIndex[mod[:-len("_mod")]]
+         for mod in rules.Skills.values()], dtype=np.intp)
+
+    # Columns of role and race stats used by formulas, made when needed
+    tables["stats"] = {}
+
+    rules.derived["batchTables"] = tables
+    return tables
+
+
+def _stat_table(name):
+    """
+    A role or race stat used in a formula, e.g. HitpointsBase, as an array
+    to index with roles or races, and which of the two it is.
+    """
+    np = rd.numpy()
+    rules = rs.rules
+    stats = _tables()["stats"]
+    try:
+        return stats[name]
+    except KeyError:
+        pass
+    for column, names, table in (("roles", rules.Roles, rules.RoleStats),
+                                 ("races", rules.Races, rules.RaceStats)):
+        if all(name in table[i] for i in names):
+            stats[name] = (column, np.array([table[i][name] for i in names]))
+            return stats[name]
+    raise KeyError("No value for " + name + " for every role or race")
+
+
+class CharacterBatch(object):
+    """
+    A roster of N characters stored as columns rather than N Characters.
+
+    Races, roles and backgrounds are stored as indexes into rules.Races,
+    rules.Roles and rules.Backgrounds, and ability scores as an N x 6 int8
+    array in the order of rules.Attributes. The batch versions of
+    auto_assign, add_bonuses, modifier_assign and set_mods work on the
+    whole roster at once.
+    """
+
+    def __init__(self, names, races, roles, backgrounds):
+        """ races, roles and backgrounds are arrays of indexes."""
+        np = rd.numpy()
+        n = len(names)
+        numAttribs = len(rs.rules.Attributes)
+
+        self.names = list(names)
+        self.races = np.asarray(races, dtype=np.int8)
+        self.roles = np.asarray(roles, dtype=np.int8)
+        self.backgrounds = np.asarray(backgrounds, dtype=np.int8)
+        if not (len(self.races) == len(self.roles) ==
+                len(self.backgrounds) == n):
+            raise ValueError("Every column of a CharacterBatch needs " +
+                             str(n) + " entries")
+
+        self.scorelists = np.zeros((n, numAttribs), dtype=np.int8)
+        self.scores = np.zeros((n, numAttribs), dtype=np.int8)
+        self.mods = None
+        self.set_mods()
+
+        self.hitpoints = np.zeros(n, dtype=np.int16)
+        self.level = np.ones(n, dtype=np.int8)
+        # Like a new Character, AC is from the modifiers of 0 scores
+        self.AC = self.evaluate("AC").astype(np.int16)
+        self.xp = np.zeros(n, dtype=np.int32)
+
+    def __len__(self):
+        return len(self.names)
+
+    @classmethod
+    def random(cls, n, rng=None):
+        """
+        Randomly generate n characters, like rpgBuilder.random_gen.
+
+        Only the race, role, background and name are chosen, call auto_assign,
+        add_bonuses and modifier_assign to finish them off.
+        """
+        rules = rs.rules
+        gen = rd.np_generator(rng)
+        races = gen.integers(len(rules.Races), size=n)
+        roles = gen.integers(len(rules.Roles), size=n)
+        backgrounds = gen.integers(len(rules.Backgrounds), size=n)
+        names = [rs.random_name(rules.Races[i], rng) for i in races]
+
+        batch = cls(names, races, roles, backgrounds)
+        batch.scorelists = rs.stat_roll_batch(n, backend="numpy", rng=rng)
+        return batch
+
+    @classmethod
+    def from_characters(cls, chars):
+        """ Make a CharacterBatch from a list of Characters."""
+        np = rd.numpy()
+        rules = rs.rules
+        raceIndex = {r: i for i, r in enumerate(rules.Races)}
+        roleIndex = {r: i for i, r in enumerate(rules.Roles)}
+        bgIndex = {b: i for i, b in enumerate(rules.Backgrounds)}
+
+        try:
+            batch = cls([c.getName() for c in chars],
+                        [raceIndex[c.getRace()] for c in chars],
+                        [roleIndex[c.getRole()] for c in chars],
+                        [bgIndex[c.getBackground()] for c in chars])
+        except KeyError as err:
+            raise ValueError(str(err) + " is not in the ruleset, so can't " +
+                             "be stored in a CharacterBatch") from None
+
+        for i, c in enumerate(chars):
+            batch.scores[i] = [c.getAttrib(a) for a in rules.Attributes]
+            scorelist = c.getScorelist()
+            if scorelist:
+                batch.scorelists[i] = scorelist
+        batch.set_mods()
+        batch.hitpoints[:] = [c.getHitpoints() for c in chars]
+        batch.AC[:] = [c.getAC() for c in chars]
+        batch.level[:] = [c.getLevel() for c in chars]
+        batch.xp[:] = [c.getXP() for c in chars]
+        return batch
+
+    def character(self, i):
+        """ The i'th character of the roster as a Character."""
+        rules = rs.rules
+        char = rs.Character(self.names[i], rules.Races[self.races[i]],
+                            rules.Roles[self.roles[i]],
+                            rules.Backgrounds[self.backgrounds[i]])
+        for a, score in zip(rules.Attributes, self.scores[i].tolist()):
+            char.setAttrib(a, score)
+        char.setScorelist(self.scorelists[i].tolist())
+        char.setHitpoints(self.hitpoints[i])
+        char.setAC(int(self.AC[i]))
+        char.setLevelRules(int(self.level[i]))
+        char.setXP(int(self.xp[i]))
+        return char
+
+    def to_characters(self):
+        """ The whole roster as a list of Characters."""
+        return [self.character(i) for i in range(len(self))]
+
+    def _formula_values(self, formula, values, rows=None):
+        """
+        values, with anything else formula needs as a column for each
+        character, or for just the characters in rows.
+        """
+        rules = rs.rules
+        for name in formula.names:
+            if name in values:
+                continue
+            if name in rules.AttributeIndex:
+                column = self.scores[:, rules.AttributeIndex[name]]
+            elif (name.endswith("_mod") and
+                    name[:-len("_mod")] in rules.AttributeIndex):
+                column = self.mods[:, rules.AttributeIndex[name[:-len("_mod")]]]
+            elif name == "Level":
+                column = self.level
+            elif name == "ProficiencyBonus":
+                column = self.proficiency_bonus()
+            else:
+                which, table = _stat_table(name)
+                column = table[getattr(self, which)]
+            values[name] = column if rows is None else column[rows]
+        return values
+
+    def evaluate(self, formula, rows=None, **values):
+        """
+        Work out one of rules.Formulas for every character at once, or for
+        the characters in rows, with the same compiled formula Character
+        uses. Values for any names can be given instead.
+        """
+        np = rd.numpy()
+        formula = rs.rules.Formulas[formula]
+        result = formula(self._formula_values(formula, values, rows))
+        size = len(self) if rows is None else len(rows)
+        return np.broadcast_to(result, (size,) + np.shape(result)[1:])
+
+    # Batch versions of the rpgSystem functions
+    def set_mods(self):
+        """ Sets all the ability modifiers, an N x 6 array."""
+        self.mods = (self.scores - 10) // 2
+
+    def skills(self):
+        """ N x len(rules.Skills) array of each skill, in rules.Skills order."""
+        return self.mods[:, _tables()["skillAttribs"]]
+
+    def auto_assign(self):
+        """ Assigns every character's ability scores based on its class."""
+        np = rd.numpy()
+        priority = _tables()["priority"][self.roles]
+        self.scores = np.take_along_axis(self.scorelists, priority, axis=1)
+
+    def add_bonuses(self, rng=None):
+        """ Bases every character's bonuses on its race."""
+        np = rd.numpy()
+        self.scores += _tables()["bonus"][self.races]
+
+        # Bonuses to randomly chosen scores, like Half-Elves get
+        for race, bonuses in enumerate(_tables()["randomBonuses"]):
+            if not bonuses:
+                continue
+            rows = np.flatnonzero(self.races == race)
+            if len(rows):
+                picks = rd.np_generator(rng).integers(
+                    len(rs.rules.Attributes), size=(len(rows), len(bonuses)))
+                for column, bonus in zip(picks.T, bonuses):
+                    np.add.at(self.scores, (rows, column), bonus)
+
+    def modifier_assign(self):
+        """ Sets every character's hitpoints from the Hitpoints formula."""
+        self.set_mods()
+        self.hitpoints = self.evaluate("Hitpoints").astype(rd.numpy().int16)
+
+    def proficiency_bonus(self):
+        """ Every character's proficiency bonus at its level."""
+        return _tables()["proficiencyBonus"][self.roles, self.level]
+
+    def level_to(self, levels, rng=None):
+        """
+        Levels every character up to levels in one go, like
+        Character.level_to. levels can be one level for the whole roster or
+        an array with a level for each character.
+        """
+        np = rd.numpy()
+        tables = _tables()
+        levels = np.broadcast_to(np.asarray(levels, dtype=np.int16),
+                                 self.level.shape)
+        steps = levels - self.level
+        if (steps < 0).any():
+            raise ValueError("Can't level characters down")
+        if (levels > tables["maxLevel"][self.roles]).any():
+            raise ValueError("Some characters' roles don't go up to the " +
+                             "level asked for")
+        leveled = steps > 0
+        if not leveled.any():
+            return
+
+        # Roll every hit die needed for each kind of hit die at once, as an
+        # N x most steps array with the dice past each character's steps
+        # unused, and put each through the Level Hitpoints formula
+        self.set_mods()
+        formula = rs.rules.Formulas["Level Hitpoints"]
+        hitDie = tables["hitDie"][self.roles]
+        gained = np.zeros(len(self), dtype=np.int64)
+        for die in np.unique(hitDie[leveled]):
+            rows = np.flatnonzero(leveled & (hitDie == die))
+            rowSteps = steps[rows]
+            shape = (len(rows), rowSteps.max())
+            dice = tables["hitDice"][die].roll_batch(
+                shape[0] * shape[1], backend="numpy", rng=rng).reshape(shape)
+            used = np.arange(dice.shape[1]) < rowSteps[:, None]
+            # The level each die is rolled for, kept in the role's table for
+            # the unused dice, and its proficiency bonus
+            stepLevels = np.minimum(
+                self.level[rows, None] + 1 + np.arange(dice.shape[1]),
+                levels[rows, None])
+            perDie = {"HitDie": dice,
+                      "Level": stepLevels,
+                      "ProficiencyBonus": tables["proficiencyBonus"][
+                          self.roles[rows, None], stepLevels]}
+            values = self._formula_values(formula, dict(perDie), rows)
+            for name in values:
+                if name not in perDie:
+                    values[name] = values[name][:, None]
+            gained[rows] = (np.broadcast_to(formula(values), dice.shape) *
+                            used).sum(axis=1)
+
+        self.hitpoints = (self.hitpoints + gained).astype(np.int16)
+        self.level = levels.astype(np.int8)
+        self.AC = np.where(leveled, self.evaluate("AC"), self.AC).astype(
+            np.int16)
@@ -6,10 +6,15 @@ Character Generator for 5th Edition Dungeons and Dragons (and someday any rpg).
 @author: auto-nom
 """
 
+import json
 import sys
-import random
 
 import rpgSystem as rs
+import rpgDice as rd
+
+# Bump this whenever random_gen changes what character a given seed makes,
+# so characters saved as seeds aren't silently regenerated differently
+GENERATOR_VERSION = 1
 
 
 def easy_gen(name, race, role, background):
@@ -29,32 +34,61 @@ def easy_gen(name, race, role, background):
     return p
 
 
-def random_gen():
-    """ Randomly generates a character."""
-    race = random.choice(rs.rpgData["Races"])
-    role = random.choice(rs.rpgData["Roles"])
-    background = random.choice(rs.rpgData["Backgrounds"])
+def random_gen(rng=None):
+    """
+    Randomly generates a character.
 
-    names = []
-    majorRace = rs.RaceStats[race]["majorRace"]
-    for i in majorRace:
-        try:
-            names += rs.namesData[i + "_names"]
-        except KeyError:
-            names += rs.namesData["Common_names"]
+    Pass a seeded rd.DiceRNG as rng to get the same character every time.
+    """
+    rand = rd.get_random(rng)
+    race = rand.choice(rs.rules.rpgData["Races"])
+    role = rand.choice(rs.rules.rpgData["Roles"])
+    background = rand.choice(rs.rules.rpgData["Backgrounds"])
 
-    name = random.choice(names)
+    name = rs.random_name(race, rng)
 
     Char = rs.Character(name, race, role, background)
-    sList = rs.stat_roll()
+    sList = rs.stat_roll(rng)
     Char.setScorelist(sList)
     rs.auto_assign(Char)
-    rs.add_bonuses(Char)
+    rs.add_bonuses(Char, rng)
     rs.modifier_assign(Char)
 
     return Char
 
 
+def _random_gen_stream(args):
+    """ Generate num characters from one stream, for random_gen_many."""
+    seed, key, num = args
+    rng = rd.DiceRNG(seed, key)
+    return [random_gen(rng) for i in range(num)]
+
+
+def random_gen_many(num, rng=None, workers=1):
+    """
+    Randomly generates num characters, split across worker processes.
+
+    Each worker gets its own stream split from rng, so the same seed and
+    number of workers always gives the same characters, in the same order.
+    """
+    if rng is None:
+        rng = rd.DiceRNG()
+    workers = max(1, min(workers, num))
+    streams = rng.split(workers)
+    jobs = [(s.seed, s.key, num // workers + (i < num % workers))
+            for i, s in enumerate(streams)]
+
+    if workers == 1:
+        chunks = map(_random_gen_stream, jobs)
+    else:
+        # Imported here as it is slow to import and rarely needed
+        from concurrent.futures import ProcessPoolExecutor
+        with ProcessPoolExecutor(workers) as pool:
+            chunks = list(pool.map(_random_gen_stream, jobs))
+
+    return [char for chunk in chunks for char in chunk]
+
+
 def new_player():
     """ Allows a user to generate a new character, step by step."""
     race = rs.race_gen()
@@ -74,9 +108,31 @@ def new_player():
 
 # ---------------------------------------------------------------------------
 def startCheck():
-    if len(sys.argv) != 2:
+    if len(sys.argv) in (3, 4) and sys.argv[1] == "roll":
+        values = None
+        if len(sys.argv) == 4:
+            # Names like CON are filled in from the saved character given
+            try:
+                with open(sys.argv[3], 'r') as savefile:
+                    values = rs.Character.from_dict(
+                        json.load(savefile)).getRollValues()
+            except OSError as err:
+                print("Could not read", sys.argv[3] + ":", err.strerror)
+                return 1
+            except ValueError as err:
+                print(sys.argv[3], "is not a saved character:", err)
+                return 1
+        try:
+            print(rd.compile_roll(sys.argv[2]).roll(values))
+        except (ValueError, KeyError) as err:
+            print(err.args[0])
+            return 1
+        return 0
+    elif len(sys.argv) != 2:
         print('Usage: python rpgBuilder.py "random"',
-              'or python rpgBuilder.py "new"')
+              'or python rpgBuilder.py "new"',
+              'or python rpgBuilder.py roll "4d6kh3+2"',
+              'or python rpgBuilder.py roll "1d8+CON" <saved character>')
         return 1
     else:
         if sys.argv[1] == "random":
@@ -91,7 +147,9 @@ def startCheck():
             return 0
         else:
             print('Usage: python rpgBuilder.py "random"',
-                  'or python rpgBuilder.py "new"')
+                  'or python rpgBuilder.py "new"',
+                  'or python rpgBuilder.py roll "4d6kh3+2"',
+                  'or python rpgBuilder.py roll "1d8+CON" <saved character>')
             return 1
 
 if __name__ == '__main__':
@@ -0,0 +1,333 @@
+# -*- coding: utf-8 -*-
+"""
+Dice rolling engine for the rpg, able to roll lots of dice in one go.
+
+Uses NumPy for batch rolls if it is installed, and plain python otherwise.
+
+@author: auto-nom
+"""
+
+import hashlib
+import importlib
+import importlib.util
+import random
+import re
+import secrets
+from functools import lru_cache
+
+# NumPy is optional, and slow to import, so it is only imported when needed
+HAVE_NUMPY = importlib.util.find_spec("numpy") is not None
+np = None
+
+# Backend used by roll_batch when one isn't given, numpy is far quicker for
+# big batches but slower than plain python for a handful of dice
+BACKEND = "numpy" if HAVE_NUMPY else "python"
+BACKENDS = ("numpy", "python")
+
+_npGen = None
+
+
+def set_backend(name):
+    """ Set the default backend for batch rolls, "numpy" or "python"."""
+    global BACKEND
+    if name not in BACKENDS:
+        raise ValueError("Unknown dice backend " + str(name))
+    if name == "numpy" and not HAVE_NUMPY:
+        raise ImportError("NumPy is not installed, use the python backend")
+    BACKEND = name
+
+
+def numpy():
+    """ The numpy module, imported the first time it is needed."""
+    global np
+    if np is None:
+        if not HAVE_NUMPY:
+            raise ImportError("NumPy is not installed, use the python backend")
+        np = importlib.import_module("numpy")
+    return np
+
+
+def np_generator(rng=None):
+    """
+    The NumPy generator to use, rng's stream if one is given or a shared
+    one, created when first needed, if not.
+    """
+    global _npGen
+    if rng is not None:
+        return rng.numpy
+    if _npGen is None:
+        _npGen = numpy().random.default_rng()
+    return _npGen
+
+
+def get_random(rng=None):
+    """
+    The python random generator to use, rng's stream if one is given or
+    the shared random module state if not.
+    """
+    if rng is None:
+        return random
+    return rng.random
+
+
+class DiceRNG(object):
+    """
+    An explicit, seedable source of randomness for dice and generation.
+
+    Pass one as rng to the dice and generation functions to get
+    reproducible results. split() makes independent child streams, e.g. one
+    per worker process, that are still fully determined by the seed, so
+    parallel runs are deterministic without sharing any state.
+    """
+
+    def __init__(self, seed=None, key=()):
+        if seed is None:
+            seed = secrets.randbits(64)
+        if not isinstance(seed, int) or seed < 0:
+            raise ValueError("Seed must be a non-negative integer")
+        self.seed = seed
+        # Position of this stream in the tree of splits from the seed
+        self.key = tuple(key)
+        self.random = random.Random(self._derived_seed())
+        self._numpy = None
+        self._children = 0
+
+    def _derived_seed(self):
+        """ A seed for this stream, so sibling streams don't overlap."""
+        digest = hashlib.sha256(repr((self.seed, self.key)).encode()).digest()
+        return int.from_bytes(digest, "big")
+
+    @property
+    def numpy(self):
+        """ NumPy generator for this stream, created when first needed."""
+        if self._numpy is None:
+            np = numpy()
+            self._numpy = np.random.default_rng(
+                np.random.SeedSequence(self.seed, spawn_key=self.key))
+        return self._numpy
+
+    def split(self, n=2):
+        """ Make n new independent streams from this one."""
+        start = self._children
+        self._children += n
+        return [DiceRNG(self.seed, self.key + (i,))
+                for i in range(start, start + n)]
+
+    def __repr__(self):
+        return "DiceRNG(seed={}, key={})".format(self.seed, self.key)
+
+
+def _check(sides, num, rolls):
+    """ Make sure the dice asked for can actually be rolled."""
+    if sides < 1:
+        raise ValueError("Dice must have at least 1 side, not " + str(sides))
+    if num < 0 or rolls < 0:
+        raise ValueError("Can't roll a negative number of dice")
+
+
+def roll_dice(sides, num=1, rng=None):
+    """
+    Rolls num dice with a specified number of sides.
+
+    Output: a list of the individual dice results.
+    """
+    _check(sides, num, 1)
+    return get_random(rng).choices(range(1, sides + 1), k=num)
+
+
+def roll_batch(sides, num=1, rolls=1, per_die=False, backend=None,
+               dtype=None, rng=None):
+    """
+    Makes many rolls of num dice with a specified number of sides at once.
+
+    Output: the total of each roll, or with per_die the individual dice of
+    each roll (a rolls x num array with numpy, a list of lists without).
+    dtype sets the integer type of numpy arrays, to save memory on big batches.
+    """
+    _check(sides, num, rolls)
+    if backend is None:
+        backend = BACKEND
+
+    if backend == "numpy":
+        np = numpy()
+        if dtype is None:
+            dtype = np.int64
+        results = np_generator(rng).integers(1, sides + 1, size=(rolls, num),
+                                             dtype=dtype)
+        if per_die:
+            return results
+        return results.sum(axis=1, dtype=dtype)
+
+    elif backend == "python":
+        if num == 0:
+            return [[] for i in range(rolls)] if per_die else [0] * rolls
+        flat = get_random(rng).choices(range(1, sides + 1), k=rolls * num)
+        if per_die:
+            return [flat[i:i + num] for i in range(0, rolls * num, num)]
+        if num == 1:
+            return flat
+        return [sum(flat[i:i + num]) for i in range(0, rolls * num, num)]
+
+    else:
+        raise ValueError("Unknown dice backend " + str(backend))
+
+
+# ---------------------------------------------------------------------------
+# Dice notation, e.g. "4d6kh3+2", "2d20kl1", "1d8+CON", "D12"
+_TERM = re.compile(r"([+-]?)(?:(\d*)[dD](\d+)(?:(kh|kl|dh|dl|k)(\d+))?"
+                   r"|(\d+)|([A-Za-z_][A-Za-z_0-9]*))")
+
+
+class DiceExpression(object):
+    """
+    A compiled dice expression, which can be rolled over and over without
+    parsing the text again. Made with compile_roll rather than directly.
+
+    Names in the expression (like CON) are looked up in the values given
+    when rolling, so the same expression works for any character.
+    """
+
+    def __init__(self, text, dice, flat, names):
+        self.text = text
+        # dice is a tuple of (sign, num, sides, keep, lowest) for each term
+        self.dice = dice
+        self.flat = flat
+        # names is a tuple of (sign, name) for each named term
+        self.names = names
+
+    def _named(self, values):
+        """ Total of the named terms, looked up in values."""
+        total = 0
+        for sign, name in self.names:
+            try:
+                total += sign * values[name]
+            except (KeyError, TypeError):
+                raise KeyError("No value given for " + name + " in " +
+                               self.text) from None
+        return total
+
+    def roll(self, values=None, rng=None):
+        """ Roll the expression once and return the total."""
+        total = self.flat
+        if self.names:
+            total += self._named(values)
+        for sign, num, sides, keep, lowest in self.dice:
+            results = roll_dice(sides, num, rng)
+            if keep is not None:
+                results.sort(reverse=not lowest)
+                results = results[:keep]
+            total += sign * sum(results)
+        return total
+
+    def roll_batch(self, rolls, values=None, backend=None, rng=None):
+        """
+        Roll the expression rolls times at once, returning all the totals.
+
+        With numpy, values may hold arrays with a value for each roll.
+        """
+        if backend is None:
+            backend = BACKEND
+        if backend == "numpy":
+            np = numpy()
+            totals = np.full(rolls, self.flat, dtype=np.int64)
+        else:
+            totals = [self.flat] * rolls
+
+        for sign, num, sides, keep, lowest in self.dice:
+            if keep is None:
+                results = roll_batch(sides, num, rolls, backend=backend,
+                                     rng=rng)
+            elif backend == "numpy":
+                results = roll_batch(sides, num, rolls, per_die=True,
+                                     backend=backend, rng=rng)
+                results.sort(axis=1)
+                results = results[:, :keep] if lowest else results[:, num-keep:]
+                results = results.sum(axis=1)
+            else:
+                results = [sum(sorted(r, reverse=not lowest)[:keep]) for r in
+                           roll_batch(sides, num, rolls, per_die=True,
+                                      backend=backend, rng=rng)]
+
+            if backend == "numpy":
+                totals += sign * results
+            else:
+                totals = [t + sign * r for t, r in zip(totals, results)]
+
+        if self.names:
+            named = self._named(values)
+            if backend == "numpy":
+                totals = totals + named
+            else:
+                totals = [t + named for t in totals]
+        return totals
+
+    def distribution(self, values=None):
+        """ The exact distribution of the expression, from rpgProb."""
+        import rpgProb
+
+        dist = rpgProb.constant(self.flat)
+        if self.names:
+            dist = dist + self._named(values)
+        for sign, num, sides, keep, lowest in self.dice:
+            part = rpgProb.dice_dist(sides, num, keep, lowest)
+            dist = dist + part if sign > 0 else dist - part
+        return dist
+
+    def __repr__(self):
+        return "DiceExpression(" + repr(self.text) + ")"
+
+
+@lru_cache(maxsize=1024)
+def compile_roll(text):
+    """
+    Parse some dice notation once into a reusable DiceExpression.
+
+    Understands NdS (N defaults to 1), keep/drop highest/lowest with
+    kh, kl, dh and dl (k is keep highest), numbers, and names, all added
+    or subtracted, e.g. "4d6kh3+2", "2d20kl1", "1d8+CON".
+    """
+    # Spaces are fine around + and -, but not inside a term
+    source = re.sub(r"\s*([+-])\s*", r"\1", str(text).strip())
+    dice = []
+    flat = 0
+    names = []
+    pos = 0
+
+    while pos < len(source):
+        match = _TERM.match(source, pos)
+        # Every term after the first needs a + or - in front of it
+        if not match or match.end() == pos or (pos and not match.group(1)):
+            raise ValueError("Invalid dice expression: " + str(text))
+        signStr, num, sides, mode, count, number, name = match.groups()
+        sign = -1 if signStr == "-" else 1
+
+        if sides is not None:
+            num = int(num) if num else 1
+            sides = int(sides)
+            if sides < 1:
+                raise ValueError("Dice must have at least 1 side in " +
+                                 str(text))
+            keep = None
+            lowest = False
+            if mode is not None:
+                count = int(count)
+                if mode in ("kh", "k"):
+                    keep = count
+                elif mode == "kl":
+                    keep, lowest = count, True
+                elif mode == "dl":
+                    keep = num - count
+                else:
+                    keep, lowest = num - count, True
+                keep = min(max(keep, 0), num)
+            dice.append((sign, num, sides, keep, lowest))
+        elif number is not None:
+            flat += sign * int(number)
+        else:
+            names.append((sign, name))
+        pos = match.end()
+
+    if not source:
+        raise ValueError("Invalid dice expression: " + str(text))
+
+    return DiceExpression(source, tuple(dice), flat, tuple(names))
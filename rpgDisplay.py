@@ -9,6 +9,7 @@ GUI for RPG Character Builder
 import sys
 import random
 import json
+import sqlite3
 
 from PyQt5.QtCore import Qt, pyqtSignal, QObject, QMimeData
 from PyQt5.QtGui import QIcon, QFont, QColor, QPixmap, QDrag, QIntValidator
@@ -18,9 +19,23 @@ from PyQt5.QtWidgets import(QApplication, QMainWindow, QWidget, QAction,
                             QHBoxLayout, QVBoxLayout, QGridLayout,
                             QInputDialog, QFileDialog, QCheckBox, QFrame,
                             QSlider, QSplitter, QComboBox, QTabWidget,
-                            QScrollArea)
+                            QScrollArea, QListWidget, QProgressDialog)
 
 import rpgSystem as rs
+import rpgDice as rd
+import rpgJournal as rj
+import rpgSave as rsv
+import rpgStore as rst
+
+# Files opened as a CharacterStore to browse, rather than one character
+STORE_EXTENSIONS = (".db", ".sqlite")
+
+
+class SaveSignals(QObject):
+    """ Lets the background save thread report back to the GUI thread."""
+
+    saved = pyqtSignal(str)
+    failed = pyqtSignal(str, str)
 
 
 class MainW(QMainWindow):
@@ -29,6 +44,14 @@ class MainW(QMainWindow):
     def __init__(self):
         super().__init__()
 
+        # Saves are written on a background thread, so the GUI never waits
+        self.saveSignals = SaveSignals()
+        self.saveSignals.saved.connect(self.saveDone)
+        self.saveSignals.failed.connect(self.saveFailed)
+        self.saveQueue = rsv.SaveQueue(
+            onSaved=self.saveSignals.saved.emit,
+            onError=lambda f, err: self.saveSignals.failed.emit(f, str(err)))
+
         self.initUI()
 
     def initUI(self):
@@ -48,12 +71,29 @@ class MainW(QMainWindow):
         openFile.setStatusTip('Open new File')
         openFile.triggered.connect(self.openDialog)
 
+        # Open folder action
+        openFolder = QAction(QIcon('Icons/Storage.ico'), 'Open &Folder', self)
+        openFolder.setShortcut('Ctrl+Shift+O')
+        openFolder.setStatusTip('Open every Character saved in a folder')
+        openFolder.triggered.connect(self.openFolderDialog)
+
         # Save file action
         saveFile = QAction(QIcon('Icons/Document.ico'), '&Save', self)
         saveFile.setShortcut('Ctrl+S')
         saveFile.setStatusTip('Save File')
         saveFile.triggered.connect(self.saveDialog)
 
+        # Undo and redo actions, for edits to the current tab's character
+        undoAction = QAction('&Undo', self)
+        undoAction.setShortcut('Ctrl+Z')
+        undoAction.setStatusTip('Undo the last change to the character')
+        undoAction.triggered.connect(self.undoEdit)
+
+        redoAction = QAction('&Redo', self)
+        redoAction.setShortcut('Ctrl+Shift+Z')
+        redoAction.setStatusTip('Redo the last change undone')
+        redoAction.triggered.connect(self.redoEdit)
+
         # New tab action
         tabAction = QAction(QIcon('Icons/New.png'), 'New &Tab', self)
         tabAction.setShortcut('Ctrl+T')
@@ -66,8 +106,12 @@ class MainW(QMainWindow):
         fileMenu = menubar.addMenu('&File')
         fileMenu.addAction(exitAction)
         fileMenu.addAction(openFile)
+        fileMenu.addAction(openFolder)
         fileMenu.addAction(saveFile)
         fileMenu.addAction(tabAction)
+        editMenu = menubar.addMenu('&Edit')
+        editMenu.addAction(undoAction)
+        editMenu.addAction(redoAction)
 
         self.toolbar = self.addToolBar('Toolbar')
         self.toolbar.addAction(exitAction)
@@ -95,7 +139,18 @@ class MainW(QMainWindow):
         """ Open and load a saved Character file."""
 
         fname = QFileDialog.getOpenFileName(self, 'Open file', '/home')
-        if fname[0]:
+        if fname[0].endswith(STORE_EXTENSIONS):
+            # Stores hold many characters, so browse them to pick one. Only
+            # existing stores are opened, nothing is added to other files
+            try:
+                store = rst.CharacterStore(fname[0], create=False)
+            except (sqlite3.DatabaseError, ValueError):
+                QMessageBox.question(self, 'Invalid filetype',
+                                     "That file could not be loaded",
+                                     QMessageBox.Ok, QMessageBox.Ok)
+                return
+            self.browser = StoreBrowserW(self, store, fname[0])
+        elif fname[0]:
             # Create a new tab to display the character in
             x = self.tab_widget.newTab()
             self.tab_widget.tabs.setCurrentWidget(x)
@@ -116,6 +171,54 @@ class MainW(QMainWindow):
                 self.tab_widget.tabs.currentWidget().widget().layout.addWidget(
                     self.tab_widget.tabs.currentWidget().widget().cdw)
 
+    def openFolderDialog(self):
+        """ Load every saved Character in a folder, to browse them."""
+
+        folder = QFileDialog.getExistingDirectory(self, 'Open folder', '/home')
+        if not folder:
+            return
+        paths = rsv.save_files(folder)
+
+        progress = QProgressDialog("Loading characters...", "Cancel", 0,
+                                   len(paths), self)
+        progress.setWindowModality(Qt.WindowModal)
+
+        # Characters are loaded across processes and shown as they arrive
+        players = []
+        errors = []
+        results = rsv.load_many(paths, ordered=False)
+        for done, (filename, player, error) in enumerate(results, 1):
+            if error is None:
+                players.append(player)
+            else:
+                errors.append(filename + ": " + error)
+            progress.setValue(done)
+            if progress.wasCanceled():
+                results.close()
+                break
+        progress.setValue(len(paths))
+
+        if errors:
+            QMessageBox.question(self, 'Some files not loaded',
+                                 str(len(errors)) + " files could not be "
+                                 "loaded:\n" + "\n".join(errors[:10]),
+                                 QMessageBox.Ok, QMessageBox.Ok)
+
+        # List them to pick from, so a big folder isn't a tab each
+        self.browser = CharListW(self, players, folder)
+
+    def openChar(self, player):
+        """ Display a character in a new tab."""
+        x = self.tab_widget.newTab()
+        self.tab_widget.tabs.setCurrentWidget(x)
+        tab = x.widget()
+        tab.PC = player
+        tab.rndmBtn.hide()
+        tab.newBtn.hide()
+        tab.diceBtn.hide()
+        tab.cdw = CharDisplayW(tab)
+        tab.layout.addWidget(tab.cdw)
+
     def saveDialog(self):
         """ Save a Character to a file."""
 
@@ -125,11 +228,27 @@ class MainW(QMainWindow):
             char = self.tab_widget.tabs.currentWidget().widget().PC
             filename = fname[0]
 
-            charDict = char.getCharDict()
+            # The file dialog has already asked about overwriting
+            self.saveQueue.save(char, filename)
+            self.statusBar().showMessage('Saving ' + filename)
+
+    def saveDone(self, filename):
+        self.statusBar().showMessage('Saved ' + filename)
 
-            with open(filename, 'w') as f:
-                json.dump(charDict, f, sort_keys=True, indent=4)
-                print("Save successful")
+    def saveFailed(self, filename, error):
+        QMessageBox.question(self, 'Save failed',
+                             filename + " could not be saved: " + error,
+                             QMessageBox.Ok, QMessageBox.Ok)
+
+    def undoEdit(self):
+        """ Undo the last change to the current tab's character."""
+        if self.tab_widget.tabs.currentWidget() is not None:
+            self.tab_widget.tabs.currentWidget().widget().undoEdit()
+
+    def redoEdit(self):
+        """ Redo the last undone change to the current tab's character."""
+        if self.tab_widget.tabs.currentWidget() is not None:
+            self.tab_widget.tabs.currentWidget().widget().redoEdit()
 
     def closeEvent(self, event):
         """ Confirm the user wants to quit."""
@@ -140,6 +259,8 @@ class MainW(QMainWindow):
                                      QMessageBox.No)
 
         if reply == QMessageBox.Yes:
+            # Finish writing any saves still waiting first
+            self.saveQueue.close()
             event.accept()
         else:
             event.ignore()
@@ -190,6 +311,9 @@ class Tab(QWidget):
 
         # Each tab will have a character local to it
 #        self.PC = rs.Character(None, None, None, None)
+        # The history of changes to the character, for undo and redo
+        self.journal = None
+        self.cdw = None
 
         self.layout = QVBoxLayout(self)
 
@@ -226,19 +350,11 @@ class Tab(QWidget):
     def randomChar(self):
         """ Randomly generate a character."""
 
-        race = random.choice(rs.rpgData["Races"])
-        role = random.choice(rs.rpgData["Roles"])
-        background = random.choice(rs.rpgData["Backgrounds"])
+        race = random.choice(rs.rules.rpgData["Races"])
+        role = random.choice(rs.rules.rpgData["Roles"])
+        background = random.choice(rs.rules.rpgData["Backgrounds"])
 
-        names = []
-        majorRace = rs.RaceStats[race]["majorRace"]
-        for i in majorRace:
-            try:
-                names += rs.namesData[i + "_names"]
-            except KeyError:
-                names += rs.namesData["Common_names"]
-
-        name = random.choice(names)
+        name = rs.random_name(race)
 
         Char = rs.Character(name, race, role, background)
         sList = rs.stat_roll()
@@ -252,16 +368,47 @@ class Tab(QWidget):
         # Don't hide random button here, for convenience to re-random
         self.newBtn.hide()
         self.diceBtn.hide()
-        try:
+        if self.cdw is not None:
             self.layout.removeWidget(self.cdw)
             self.cdw.close()
             self.layout.update()
-        except AttributeError:
-            pass
 
         self.cdw = CharDisplayW(self)
         self.layout.addWidget(self.cdw)
 
+    def recordChar(self):
+        """ Add any changes to the character to its edit history."""
+        if self.journal is None:
+            self.journal = rj.CharacterJournal(self.PC)
+        else:
+            self.journal.record(self.PC)
+
+    def showChar(self):
+        """ Display the character again, replacing the current display."""
+        self.layout.removeWidget(self.cdw)
+        self.cdw.close()
+        self.cdw = CharDisplayW(self)
+        self.layout.addWidget(self.cdw)
+
+    def undoEdit(self):
+        """ Go back to the character before its last change."""
+        # Only while the character is displayed, not part way through an edit
+        if self.journal is None or self.cdw is None or not self.cdw.isVisible():
+            return
+        player = self.journal.undo()
+        if player is not None:
+            self.PC = player
+            self.showChar()
+
+    def redoEdit(self):
+        """ Reapply the last change undone."""
+        if self.journal is None or self.cdw is None or not self.cdw.isVisible():
+            return
+        player = self.journal.redo()
+        if player is not None:
+            self.PC = player
+            self.showChar()
+
     def diceRoller(self):
 
         self.rndmBtn.hide()
@@ -306,14 +453,14 @@ class NewCharW(QWidget):
         self.racePrompt = QLabel("Choose your race:")
         self.raceSel = QComboBox(self)
 
-        for i in rs.Races:
+        for i in rs.rules.Races:
             self.raceSel.addItem(i)
 
         self.raceSel.currentIndexChanged[str].connect(self.SelActivated)
         self.raceRand = QPushButton("Random")
         self.raceRand.clicked.connect(self.randomRace)
         self.race = self.raceSel.currentText()
-        self.raceLabel = QLabel(rs.RaceStats[self.race]["Description"])
+        self.raceLabel = QLabel(rs.rules.RaceStats[self.race]["Description"])
         self.raceLabel.setWordWrap(True)
 
         grid.addWidget(self.racePrompt, 1, 0)
@@ -325,14 +472,14 @@ class NewCharW(QWidget):
         self.rolePrompt = QLabel("Choose your class:")
         self.roleSel = QComboBox(self)
 
-        for i in rs.Roles:
+        for i in rs.rules.Roles:
             self.roleSel.addItem(i)
 
         self.roleSel.currentIndexChanged[str].connect(self.SelActivated)
         self.roleRand = QPushButton("Random")
         self.roleRand.clicked.connect(self.randomRole)
         self.role = self.roleSel.currentText()
-        self.roleLabel = QLabel(rs.RoleStats[self.role]["Description"])
+        self.roleLabel = QLabel(rs.rules.RoleStats[self.role]["Description"])
         self.roleLabel.setWordWrap(True)
 
         grid.addWidget(self.rolePrompt, 2, 0)
@@ -344,14 +491,14 @@ class NewCharW(QWidget):
         self.bgPrompt = QLabel("Choose your background:")
         self.bgSel = QComboBox(self)
 
-        for i in rs.Backgrounds:
+        for i in rs.rules.Backgrounds:
             self.bgSel.addItem(i)
 
         self.bgSel.currentIndexChanged[str].connect(self.SelActivated)
         self.bgRand = QPushButton("Random")
         self.bgRand.clicked.connect(self.randomBackground)
         self.background = self.bgSel.currentText()
-        self.bgLabel = QLabel(rs.BackgroundStats[self.background]["Description"])
+        self.bgLabel = QLabel(rs.rules.BackgroundStats[self.background]["Description"])
         self.bgLabel.setWordWrap(True)
 
         grid.addWidget(self.bgPrompt, 3, 0)
@@ -374,17 +521,17 @@ class NewCharW(QWidget):
 
         if sender == self.raceSel:
             self.race = text
-            self.raceLabel.setText(rs.RaceStats[self.race]["Description"])
+            self.raceLabel.setText(rs.rules.RaceStats[self.race]["Description"])
             self.raceLabel.adjustSize()
 
         elif sender == self.roleSel:
             self.role = text
-            self.roleLabel.setText(rs.RoleStats[self.role]["Description"])
+            self.roleLabel.setText(rs.rules.RoleStats[self.role]["Description"])
             self.roleLabel.adjustSize()
 
         elif sender == self.bgSel:
             self.background = text
-            self.bgLabel.setText(rs.BackgroundStats[self.background]["Description"])
+            self.bgLabel.setText(rs.rules.BackgroundStats[self.background]["Description"])
             self.bgLabel.adjustSize()
 
     def onChanged(self, text):
@@ -397,33 +544,25 @@ class NewCharW(QWidget):
     def randomName(self):
         """ Generate a random name based on the chosen race."""
 
-        names = []
-        majorRace = rs.RaceStats[self.race]["majorRace"]
-        for i in majorRace:
-            try:
-                names += rs.namesData[i + "_names"]
-            except KeyError:
-                names += rs.namesData["Common_names"]
-
-        self.name = random.choice(names)
+        self.name = rs.random_name(self.race)
         self.nameEdit.setText(self.name)
 
     def randomRace(self):
         """ Choose a random race."""
 
-        self.race = random.choice(rs.rpgData["Races"])
+        self.race = random.choice(rs.rules.rpgData["Races"])
         self.raceSel.setCurrentText(self.race)
 
     def randomRole(self):
         """ Choose a random role."""
 
-        self.role = random.choice(rs.rpgData["Roles"])
+        self.role = random.choice(rs.rules.rpgData["Roles"])
         self.roleSel.setCurrentText(self.role)
 
     def randomBackground(self):
         """ Choose a random background."""
 
-        self.background = random.choice(rs.rpgData["Backgrounds"])
+        self.background = random.choice(rs.rules.rpgData["Backgrounds"])
         self.bgSel.setCurrentText(self.background)
 
     def submitChar(self):
@@ -537,7 +676,7 @@ class StatEditW(QWidget):
             self.nxtBtn.show()
             self.sLabel.hide()
 
-            self.sList = rs.statsData["StandardPoints"]
+            self.sList = rs.rules.statsData["StandardPoints"]
 
             # At the moment a badly designed way to show the scores
             self.scoreL = '| '
@@ -650,9 +789,9 @@ class pointsW(QWidget):
 
         # Create the dictionary mapping scores to their point cost
         self.pDict = {}
-        for i in rs.statsData["PointsCost"]:
-            self.pDict[int(i)] = rs.statsData["PointsCost"][i]
-        self.points = rs.statsData["PointsTotal"]
+        for i in rs.rules.statsData["PointsCost"]:
+            self.pDict[int(i)] = rs.rules.statsData["PointsCost"][i]
+        self.points = rs.rules.statsData["PointsTotal"]
         self.sDict = {}
         self.initUI()
 
@@ -663,7 +802,7 @@ class pointsW(QWidget):
         self.layout.addWidget(self.pointsLbl)
 
         # Create the necessary amount of valChange widgets
-        for i in range(len(rs.Attributes)):
+        for i in range(len(rs.rules.Attributes)):
             self.sDict[i] = valChangeW(self)
             self.layout.addWidget(self.sDict[i])
 
@@ -796,10 +935,10 @@ class StatAssignW(QWidget):
         self.grid.addWidget(self.listS, 2, 0)
 
         # Add the required widgets for assigning scores
-        for i in range(len(rs.Attributes)):
-            self.sDict[str(rs.Attributes[i])] = (
-                                   AttributeBox(str(rs.Attributes[i]), self))
-            self.grid.addWidget(self.sDict[str(rs.Attributes[i])], i+1, 4)
+        for i in range(len(rs.rules.Attributes)):
+            self.sDict[str(rs.rules.Attributes[i])] = (
+                                   AttributeBox(str(rs.rules.Attributes[i]), self))
+            self.grid.addWidget(self.sDict[str(rs.rules.Attributes[i])], i+1, 4)
 
         self.setLayout(self.grid)
         self.show()
@@ -838,11 +977,11 @@ class StatAssignW(QWidget):
     def autoAttribs(self):
         """ Automatically assign scores to attributes. """
 
-        for i in rs.Attributes:
+        for i in rs.rules.Attributes:
             prio = i + "Priority"
             try:
                 self.sDict[str(i)].aEdit.setText(str(self.parent.PC.scorelist[
-                           rs.RoleStats[self.parent.PC.role][prio]]))
+                           rs.rules.RoleStats[self.parent.PC.role][prio]]))
                 self.sDict[str(i)].aSet.click()
             except KeyError as err:
                 print("Error:", str(err), "not found in RoleStats section of",
@@ -875,6 +1014,7 @@ class CharDisplayW(QWidget):
 
         # The character to display
         self.char = self.parent.PC
+        self.parent.recordChar()
         self.proficiencies = self.char.getProficiencies()
 
         self.grid = QGridLayout()
@@ -944,8 +1084,9 @@ class CharDisplayW(QWidget):
         # Space
 #        self.grid.setColumnMinimumWidth(1, 100)
 
-        self.attribs = self.char.getAttribDict()
-        self.mods = self.char.getModDict()
+        # Only read here, so views save copying the character's data
+        self.attribs = self.char.getAttribDict(view=True)
+        self.mods = self.char.getModDict(view=True)
         i = 0
 
         self.attLbl = QLabel("<b>Attributes</b>")
@@ -968,7 +1109,7 @@ class CharDisplayW(QWidget):
         self.grid.addWidget(self.skillLbl, i, 2)
         i += 1
 
-        self.skills = self.char.getSkillDict()
+        self.skills = self.char.getSkillDict(view=True)
         for k, v in self.skills.items():
             self.kDict[k] = [QLabel(str(k) + ": "), QLabel(str(v)), QCheckBox("Prof")]
             self.grid.addWidget(self.kDict[k][0], i, 2)
@@ -997,7 +1138,7 @@ class CharDisplayW(QWidget):
         self.grid.addWidget(self.equipLbl, j+1, 5)
         j += 2
 
-        self.equipment = self.char.getEquipment()
+        self.equipment = self.char.getEquipment(view=True)
         for i in self.equipment:
             self.equipDict[i] = QLabel(rs.textParse(i))
             self.equipDict[i].setWordWrap(True)
@@ -1010,7 +1151,7 @@ class CharDisplayW(QWidget):
         self.grid.addWidget(self.langLbl, j+1, 5)
         j += 2
 
-        self.languages = self.char.getLanguages()
+        self.languages = self.char.getLanguages(view=True)
         for i in self.languages:
             self.langDict[i] = QLabel(rs.textParse(i))
             self.langDict[i].setWordWrap(True)
@@ -1156,7 +1297,7 @@ class CharEditW(QWidget):
         # Edit the race
         self.raceLbl = QLabel("Race:")
         self.cRace = QComboBox(self)
-        for i in rs.Races:
+        for i in rs.rules.Races:
             self.cRace.addItem(i)
         self.cRace.setCurrentText(self.char.getRace())
         self.grid.addWidget(self.raceLbl, 1, 0)
@@ -1165,7 +1306,7 @@ class CharEditW(QWidget):
         # Edit the role
         self.roleLbl = QLabel("Role:")
         self.cRole = QComboBox(self)
-        for i in rs.Roles:
+        for i in rs.rules.Roles:
             self.cRole.addItem(i)
         self.cRole.setCurrentText(self.char.getRole())
         self.grid.addWidget(self.roleLbl, 2, 0)
@@ -1174,7 +1315,7 @@ class CharEditW(QWidget):
         # Edit the background
         self.bgLbl = QLabel("Background:")
         self.cBG = QComboBox(self)
-        for i in rs.Backgrounds:
+        for i in rs.rules.Backgrounds:
             self.cBG.addItem(i)
         self.cBG.setCurrentText(self.char.getBackground())
         self.grid.addWidget(self.bgLbl, 3, 0)
@@ -1210,8 +1351,8 @@ class CharEditW(QWidget):
 #        self.grid.setColumnMinimumWidth(1, 100)
 
         # Add the widgets for editing attributes
-        for i in range(len(rs.Attributes)):
-            self.sDict[i] = (AttributeEdit(str(rs.Attributes[i]), self))
+        for i in range(len(rs.rules.Attributes)):
+            self.sDict[i] = (AttributeEdit(str(rs.rules.Attributes[i]), self))
             self.grid.addWidget(self.sDict[i], i, 2, 1, 2)
 
         # Edit hitpoints
@@ -1280,7 +1421,7 @@ class CharEditW(QWidget):
         j = 8
 
         self.proficiencies = self.char.getProficiencies()
-        for i in rs.rpgData["Proficiency Types"]:
+        for i in rs.rules.rpgData["Proficiency Types"]:
             self.profDict[i] = [QLabel(str(i)), QTextEdit(str(
                                                     self.proficiencies[i]).strip('[]'))]
             self.profDict[i][1].setFixedHeight(60)
@@ -1341,7 +1482,7 @@ class CharEditW(QWidget):
         self.parent.PC.setLanguages(rs.textParse(self.langList.toPlainText()).split(', '))
 
         self.proficiencies = {}
-        for i in rs.rpgData["Proficiency Types"]:
+        for i in rs.rules.rpgData["Proficiency Types"]:
             self.proficiencies[i] = rs.textParse(self.profDict[i][1].toPlainText()).split(', ')
 
         self.parent.PC.setProficiencies(self.proficiencies)
@@ -1398,14 +1539,14 @@ class DiceW(QWidget):
         label = int(sender.text()[1:])
         total = 0
 
-        for i in range(int(self.diceNum.text())):
-            roll = random.randint(1, label)
+        for roll in rd.roll_dice(label, int(self.diceNum.text())):
             total += roll
             self.parent.topLbl.setText(self.parent.topLbl.text() +
                                        " + " + str(roll))
         for i in self.parent.dDict:
             self.parent.dDict[i].totalLabel.setText(" ")
         self.parent.cTotal.setText(" ")
+        self.parent.eTotal.setText(" ")
         self.totalLabel.setText(str(total))
         self.parent.total += total
         self.parent.resultLbl.setText(str(self.parent.total))
@@ -1467,6 +1608,17 @@ class DiceRollW(QWidget):
         self.grid.addWidget(self.cDice, j, 3)
         self.grid.addWidget(self.cRoll, j, 4)
         self.grid.addWidget(self.cTotal, j, 5)
+        j += 1
+
+        # Dice expressions, e.g. 4d6kh3+2
+        self.eText = QLineEdit("4d6kh3")
+        self.eRoll = QPushButton("Roll expression")
+        self.eRoll.clicked.connect(self.expressionRoll)
+        self.eTotal = QLabel(" ")
+
+        self.grid.addWidget(self.eText, j, 1, 1, 3)
+        self.grid.addWidget(self.eRoll, j, 4)
+        self.grid.addWidget(self.eTotal, j, 5)
 
         self.setLayout(self.grid)
 
@@ -1491,8 +1643,7 @@ class DiceRollW(QWidget):
         label = int(self.cDice.text())
         total = 0
 
-        for i in range(int(self.cNum.text())):
-            roll = random.randint(1, label)
+        for roll in rd.roll_dice(label, int(self.cNum.text())):
             total += roll
             self.topLbl.setText(self.topLbl.text() + " + " + str(roll))
         for i in self.dDict:
@@ -1501,6 +1652,171 @@ class DiceRollW(QWidget):
         self.total += total
         self.resultLbl.setText(str(self.total))
 
+    def rollValues(self):
+        """
+        Values for names like CON in dice expressions, from the character
+        on this tab, or else the one on the last tab with a character.
+        """
+        player = getattr(self.parent, "PC", None)
+        tabs = MW.tab_widget.tabs
+        i = tabs.count() - 1
+        while player is None and i >= 0:
+            player = getattr(tabs.widget(i).widget(), "PC", None)
+            i -= 1
+        if player is None:
+            return None
+        return player.getRollValues()
+
+    def expressionRoll(self):
+
+        try:
+            total = rd.compile_roll(self.eText.text()).roll(self.rollValues())
+        except (ValueError, KeyError) as err:
+            MW.statusBar().showMessage(str(err.args[0]))
+            return
+
+        self.topLbl.setText(self.topLbl.text() + " + " + str(total))
+        for i in self.dDict:
+            self.dDict[i].totalLabel.setText(" ")
+        self.cTotal.setText(" ")
+        self.eTotal.setText(str(total))
+        self.total += total
+        self.resultLbl.setText(str(self.total))
+
+
+class CharListW(QWidget):
+    """ A window listing loaded characters, to open them from."""
+
+    def __init__(self, parent, players, title):
+        super().__init__()
+
+        self.parent = parent
+        self.players = players
+
+        self.initUI(title)
+
+    def initUI(self, title):
+
+        self.layout = QVBoxLayout(self)
+
+        # Opened by double clicking or the open button
+        self.charList = QListWidget(self)
+        self.charList.itemDoubleClicked.connect(self.openSelected)
+        for char in self.players:
+            self.charList.addItem("{} - Level {} {} {}".format(
+                char.getName(), char.getLevel(), char.getRace(),
+                char.getRole()))
+        self.layout.addWidget(self.charList)
+
+        openBtn = QPushButton("Open", self)
+        openBtn.clicked.connect(self.openSelected)
+        self.layout.addWidget(openBtn)
+
+        self.setLayout(self.layout)
+        self.resize(400, 500)
+        self.setWindowTitle(title)
+        self.show()
+
+    def openSelected(self):
+        """ Open the selected character in a new tab."""
+
+        row = self.charList.currentRow()
+        if row < 0:
+            return
+        self.parent.openChar(self.players[row])
+
+
+class StoreBrowserW(QWidget):
+    """ A window to search a CharacterStore and open characters from it."""
+
+    # Most characters listed at once, as the store may hold a great many
+    LIMIT = 500
+
+    def __init__(self, parent, store, title):
+        super().__init__()
+
+        self.parent = parent
+        self.store = store
+        self.results = []
+
+        self.initUI(title)
+
+    def initUI(self, title):
+
+        self.grid = QGridLayout()
+        self.grid.setSpacing(10)
+
+        # Search filters, "Any" to not filter on that column
+        self.raceSel = QComboBox(self)
+        self.raceSel.addItems(["Any"] + list(rs.rules.Races))
+        self.grid.addWidget(QLabel("<b>Race:</b>"), 0, 0)
+        self.grid.addWidget(self.raceSel, 0, 1)
+
+        self.roleSel = QComboBox(self)
+        self.roleSel.addItems(["Any"] + list(rs.rules.Roles))
+        self.grid.addWidget(QLabel("<b>Class:</b>"), 1, 0)
+        self.grid.addWidget(self.roleSel, 1, 1)
+
+        self.bgSel = QComboBox(self)
+        self.bgSel.addItems(["Any"] + list(rs.rules.Backgrounds))
+        self.grid.addWidget(QLabel("<b>Background:</b>"), 2, 0)
+        self.grid.addWidget(self.bgSel, 2, 1)
+
+        self.minLevel = QLineEdit(self)
+        self.minLevel.setValidator(QIntValidator(1, 99))
+        self.grid.addWidget(QLabel("<b>Minimum Level:</b>"), 3, 0)
+        self.grid.addWidget(self.minLevel, 3, 1)
+
+        searchBtn = QPushButton("Search", self)
+        searchBtn.clicked.connect(self.search)
+        self.grid.addWidget(searchBtn, 4, 1)
+
+        # Characters found, opened by double clicking or the open button
+        self.resultList = QListWidget(self)
+        self.resultList.itemDoubleClicked.connect(self.openSelected)
+        self.grid.addWidget(self.resultList, 5, 0, 1, 2)
+
+        openBtn = QPushButton("Open", self)
+        openBtn.clicked.connect(self.openSelected)
+        self.grid.addWidget(openBtn, 6, 1)
+
+        self.setLayout(self.grid)
+        self.resize(400, 500)
+        self.setWindowTitle(title)
+        self.search()
+        self.show()
+
+    def search(self):
+        """ List the characters in the store matching the filters."""
+
+        filters = {}
+        for key, sel in (("race", self.raceSel), ("role", self.roleSel),
+                         ("background", self.bgSel)):
+            if sel.currentText() != "Any":
+                filters[key] = sel.currentText()
+        if self.minLevel.text():
+            filters["level"] = (int(self.minLevel.text()), None)
+
+        # Only the indexed columns are read, not whole characters
+        self.results = list(self.store.query(limit=self.LIMIT, **filters))
+        self.resultList.clear()
+        for char in self.results:
+            self.resultList.addItem("{} - Level {} {} {}".format(
+                char.getName(), char.getLevel(), char.getRace(),
+                char.getRole()))
+
+    def openSelected(self):
+        """ Load the selected character in full and open it in a new tab."""
+
+        row = self.resultList.currentRow()
+        if row < 0:
+            return
+        self.parent.openChar(self.results[row].getCharacter())
+
+    def closeEvent(self, event):
+        self.store.close()
+        event.accept()
+
 
 if __name__ == '__main__':
     app = QApplication(sys.argv)
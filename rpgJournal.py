@@ -0,0 +1,188 @@
+# -*- coding: utf-8 -*-
+"""
+An edit history for a Character, kept as an append-only journal of events.
+
+Each event is just the getCharDict fields that changed, so the character
+at any point can be rebuilt by replaying events over the last snapshot
+before it. Undo and redo are events too, so nothing is ever rewritten and
+saving only has to append the events made since the last save.
+
+@author: auto-nom
+"""
+
+import json
+
+import rpgSave as rsv
+
+# How many events between the snapshots states are rebuilt from
+SNAPSHOT_EVERY = 50
+
+EDIT = "edit"
+UNDO = "undo"
+REDO = "redo"
+
+
+class CharacterJournal(object):
+    """
+    The history of a Character, as snapshots and the events after them.
+
+    Call record after changing the character to add an edit, and undo and
+    redo to step back and forth through the edits. Both give back the
+    Character as it is after the step.
+    """
+
+    def __init__(self, player=None, snapshotEvery=SNAPSHOT_EVERY):
+        self.snapshotEvery = snapshotEvery
+        # Each event is (kind, {field: new value})
+        self.events = []
+        # (number of events before it, state) for each snapshot, oldest first
+        self.snapshots = []
+        # The latest state, as a getCharDict dictionary. Values are replaced
+        # rather than changed in place, so states can share them
+        self.state = None
+        # Events to step back to with undo, and to reapply with redo
+        self._undoStack = []
+        self._redoStack = []
+        # Events and snapshots already written by save
+        self._savedEvents = 0
+        self._savedSnapshots = 0
+        if player is not None:
+            self._start(player.getCharDict())
+
+    def _start(self, state):
+        self.state = state
+        self.snapshots.append((0, dict(state)))
+
+    def __len__(self):
+        return len(self.events)
+
+    def _append(self, kind, changes):
+        """ Add an event to the journal and apply it to the latest state."""
+        self.events.append((kind, changes))
+        self.state = dict(self.state)
+        self.state.update(changes)
+        if len(self.events) % self.snapshotEvery == 0:
+            self.snapshots.append((len(self.events), self.state))
+        return len(self.events) - 1
+
+    def _track(self, kind, index):
+        """ Keep the undo and redo stacks up to date with a new event."""
+        if kind == EDIT:
+            self._undoStack.append(index)
+            self._redoStack.clear()
+        elif kind == UNDO:
+            self._redoStack.append(self._undoStack.pop())
+        else:
+            self._redoStack.pop()
+            self._undoStack.append(index)
+
+    def state_at(self, n):
+        """ The state after the first n events."""
+        if n == len(self.events) and self.state is not None:
+            return dict(self.state)
+        # Latest snapshot at or before n, then replay the events since it
+        i = len(self.snapshots) - 1
+        while self.snapshots[i][0] > n:
+            i -= 1
+        start, state = self.snapshots[i]
+        state = dict(state)
+        for kind, changes in self.events[start:n]:
+            state.update(changes)
+        return state
+
+    def character(self, n=None):
+        """ The Character after the first n events, or as it is now."""
+        state = self.state if n is None else self.state_at(n)
+        return rsv.char_from_dict(state)
+
+    def record(self, player):
+        """
+        Add an edit with whatever has changed on player since the last event.
+
+        Returns False, adding nothing, if nothing has changed.
+        """
+        charDict = player.getCharDict()
+        if self.state is None:
+            self._start(charDict)
+            return False
+        changes = {k: v for k, v in charDict.items() if self.state.get(k) != v}
+        if not changes:
+            return False
+        self._track(EDIT, self._append(EDIT, changes))
+        return True
+
+    def canUndo(self):
+        return bool(self._undoStack)
+
+    def canRedo(self):
+        return bool(self._redoStack)
+
+    def undo(self):
+        """ Step back before the last edit, returning the Character then."""
+        if not self._undoStack:
+            return None
+        index = self._undoStack[-1]
+        before = self.state_at(index)
+        changes = {k: before[k] for k in self.events[index][1]}
+        self._track(UNDO, self._append(UNDO, changes))
+        return self.character()
+
+    def redo(self):
+        """ Reapply the last edit undone, returning the Character after it."""
+        if not self._redoStack:
+            return None
+        changes = self.events[self._redoStack[-1]][1]
+        self._track(REDO, self._append(REDO, changes))
+        return self.character()
+
+    def save(self, filename):
+        """
+        Save the journal to a file, one json object per line.
+
+        Only what was added since the last save is written, the rest is
+        already in the file.
+        """
+        mode = 'a' if self._savedEvents or self._savedSnapshots else 'w'
+        lines = []
+        # Snapshots are written just before the event they start from
+        snapshots = self.snapshots[self._savedSnapshots:]
+        for i in range(self._savedEvents, len(self.events) + 1):
+            while snapshots and snapshots[0][0] == i:
+                lines.append({"Snapshot": i, "State": snapshots.pop(0)[1]})
+            if i < len(self.events):
+                kind, changes = self.events[i]
+                lines.append({"Kind": kind, "Set": changes})
+
+        with open(filename, mode) as f:
+            for line in lines:
+                f.write(json.dumps(line, separators=(',', ':')))
+                f.write("\n")
+        self._savedEvents = len(self.events)
+        self._savedSnapshots = len(self.snapshots)
+
+
+def load_journal(filename, snapshotEvery=SNAPSHOT_EVERY):
+    """
+    Load a CharacterJournal saved by CharacterJournal.save.
+
+    Only the events after the last snapshot are replayed to get the
+    latest state, and the undo history carries on from where it was.
+    """
+    journal = CharacterJournal(snapshotEvery=snapshotEvery)
+    with open(filename, 'r') as f:
+        for line in f:
+            if not line.strip():
+                continue
+            entry = json.loads(line)
+            if "Snapshot" in entry:
+                journal.snapshots.append((entry["Snapshot"], entry["State"]))
+            else:
+                journal.events.append((entry["Kind"], entry["Set"]))
+                journal._track(entry["Kind"], len(journal.events) - 1)
+
+    if not journal.snapshots:
+        raise ValueError(str(filename) + " has no snapshot to start from")
+    journal.state = journal.state_at(len(journal.events))
+    journal._savedEvents = len(journal.events)
+    journal._savedSnapshots = len(journal.snapshots)
+    return journal
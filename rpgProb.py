@@ -0,0 +1,303 @@
+# -*- coding: utf-8 -*-
+"""
+Exact probability distributions for dice rolls, instead of simulating them.
+
+e.g. the chance a 4d6 drop lowest score is at least 15:
+    dice_dist(6, 4, keep=3).at_least(15)
+
+@author: auto-nom
+"""
+
+from fractions import Fraction
+from functools import lru_cache
+from math import comb, gcd
+
+import rpgDice
+import rpgSystem
+
+
+class Distribution(object):
+    """
+    The exact distribution of a roll, stored as a count of the ways to get
+    each total (counts[0] being the ways to roll low) out of total ways.
+
+    Distributions are immutable so can be shared, cached and combined freely.
+    """
+
+    def __init__(self, low, counts, total=None):
+        # Trim impossible results off the ends
+        counts = list(counts)
+        while counts and counts[-1] == 0:
+            counts.pop()
+        start = 0
+        while start < len(counts) and counts[start] == 0:
+            start += 1
+        if start == len(counts):
+            raise ValueError("A distribution needs a possible result")
+
+        counts = counts[start:]
+        if total is None:
+            total = sum(counts)
+        # Reduce so equal distributions always have equal counts
+        common = gcd(total, *counts)
+
+        self.low = low + start
+        self.counts = tuple(c // common for c in counts)
+        self.total = total // common
+        self._cumulative = None
+        self._mean = None
+        self._variance = None
+
+    @property
+    def high(self):
+        return self.low + len(self.counts) - 1
+
+    def values(self):
+        """ All the results that are possible."""
+        return range(self.low, self.high + 1)
+
+    def pmf(self):
+        """ Dictionary of each possible result to its exact probability."""
+        return {self.low + i: Fraction(c, self.total)
+                for i, c in enumerate(self.counts) if c}
+
+    def probability(self, value):
+        """ Chance of rolling exactly value."""
+        if value < self.low or value > self.high:
+            return Fraction(0)
+        return Fraction(self.counts[value - self.low], self.total)
+
+    def cumulative(self):
+        """ Number of ways to roll each result or lower."""
+        if self._cumulative is None:
+            running = 0
+            cumulative = []
+            for c in self.counts:
+                running += c
+                cumulative.append(running)
+            self._cumulative = tuple(cumulative)
+        return self._cumulative
+
+    def at_most(self, value):
+        """ Chance of rolling value or lower."""
+        if value < self.low:
+            return Fraction(0)
+        if value >= self.high:
+            return Fraction(1)
+        return Fraction(self.cumulative()[value - self.low], self.total)
+
+    def at_least(self, value):
+        """ Chance of rolling value or higher."""
+        return 1 - self.at_most(value - 1)
+
+    def mean(self):
+        if self._mean is None:
+            self._mean = Fraction(
+                sum((self.low + i) * c for i, c in enumerate(self.counts)),
+                self.total)
+        return self._mean
+
+    def variance(self):
+        if self._variance is None:
+            mean = self.mean()
+            self._variance = sum(
+                c * (self.low + i - mean) ** 2
+                for i, c in enumerate(self.counts)) / self.total
+        return self._variance
+
+    def std(self):
+        return float(self.variance()) ** 0.5
+
+    def percentile(self, p):
+        """
+        The lowest result that is rolled or beaten with chance p.
+
+        p is a chance between 0 and 1, e.g. Fraction(1, 2) for the median
+        or 0.9 for the 90th percentile.
+        """
+        if p < 0 or p > 1:
+            raise ValueError("Percentile must be a chance between 0 and 1")
+        # Find the first total with cumulative count >= p * total
+        target = Fraction(p) * self.total
+        cumulative = self.cumulative()
+        lo, hi = 0, len(cumulative) - 1
+        while lo < hi:
+            mid = (lo + hi) // 2
+            if cumulative[mid] >= target:
+                hi = mid
+            else:
+                lo = mid + 1
+        return self.low + lo
+
+    def median(self):
+        return self.percentile(Fraction(1, 2))
+
+    def apply(self, func):
+        """ Distribution of func(result), for a function of whole numbers."""
+        sums = {}
+        for i, c in enumerate(self.counts):
+            if c:
+                value = func(self.low + i)
+                sums[value] = sums.get(value, 0) + c
+        low = min(sums)
+        return Distribution(low, [sums.get(s, 0)
+                                  for s in range(low, max(sums) + 1)],
+                            self.total)
+
+    def __add__(self, other):
+        """ Adding a number shifts the results, adding a roll combines them."""
+        if isinstance(other, Distribution):
+            return convolve(self, other)
+        return Distribution(self.low + other, self.counts, self.total)
+
+    __radd__ = __add__
+
+    def __sub__(self, other):
+        if isinstance(other, Distribution):
+            return convolve(self, -other)
+        return self + (-other)
+
+    def __neg__(self):
+        return Distribution(-self.high, reversed(self.counts), self.total)
+
+    def __eq__(self, other):
+        if not isinstance(other, Distribution):
+            return NotImplemented
+        return ((self.low, self.counts, self.total) ==
+                (other.low, other.counts, other.total))
+
+    def __hash__(self):
+        return hash((self.low, self.counts, self.total))
+
+    def __repr__(self):
+        return "Distribution({}..{}, mean={:.3f})".format(
+            self.low, self.high, float(self.mean()))
+
+
+def constant(value):
+    """ A 'roll' that always gives value, e.g. a flat modifier."""
+    return Distribution(value, (1,))
+
+
+@lru_cache(maxsize=None)
+def convolve(a, b):
+    """ Distribution of the sum of two independent rolls."""
+    counts = [0] * (len(a.counts) + len(b.counts) - 1)
+    for i, ca in enumerate(a.counts):
+        if ca:
+            for j, cb in enumerate(b.counts):
+                counts[i + j] += ca * cb
+    return Distribution(a.low + b.low, counts, a.total * b.total)
+
+
+def _keep_dist(sides, num, keep, lowest):
+    """
+    Distribution of the keep highest (or lowest) of num dice.
+
+    Works face by face from the best face down, counting how many of the
+    dice show that face: state is (dice placed, dice kept) -> sum counts.
+    """
+    faces = range(1, sides + 1) if lowest else range(sides, 0, -1)
+    states = {(0, 0): {0: 1}}
+    for face in faces:
+        newStates = {}
+        for (placed, kept), sums in states.items():
+            left = num - placed
+            for j in range(left + 1):
+                ways = comb(left, j)
+                taken = min(j, keep - kept)
+                key = (placed + j, kept + taken)
+                target = newStates.setdefault(key, {})
+                for s, c in sums.items():
+                    s2 = s + taken * face
+                    target[s2] = target.get(s2, 0) + c * ways
+        states = newStates
+
+    sums = {}
+    for (placed, kept), partial in states.items():
+        if placed == num:
+            for s, c in partial.items():
+                sums[s] = sums.get(s, 0) + c
+    low = min(sums)
+    counts = [sums.get(s, 0) for s in range(low, max(sums) + 1)]
+    return Distribution(low, counts, sides ** num)
+
+
+@lru_cache(maxsize=None)
+def dice_dist(sides, num=1, keep=None, lowest=False):
+    """
+    Distribution of rolling num dice with a specified number of sides.
+
+    keep is how many of the dice to keep, the highest unless lowest is True,
+    so 4d6 drop lowest is dice_dist(6, 4, keep=3).
+    """
+    if sides < 1:
+        raise ValueError("Dice must have at least 1 side, not " + str(sides))
+    if num < 0:
+        raise ValueError("Can't roll a negative number of dice")
+    if keep is None or keep >= num:
+        if num == 0:
+            return constant(0)
+        if num == 1:
+            return Distribution(1, [1] * sides)
+        # Build up from halves so big pools only need a few convolutions
+        half = num // 2
+        return convolve(dice_dist(sides, half), dice_dist(sides, num - half))
+    if keep < 0:
+        raise ValueError("Can't keep a negative number of dice")
+    if keep == 0:
+        return constant(0)
+    return _keep_dist(sides, num, keep, lowest)
+
+
+def drop_dist(sides, num, drop=1, highest=False):
+    """ Distribution of num dice after dropping the lowest (or highest) few."""
+    return dice_dist(sides, num, keep=max(num - drop, 0), lowest=highest)
+
+
+def sum_dist(*rolls):
+    """ Distribution of the sum of several independent rolls and numbers."""
+    result = constant(0)
+    for roll in rolls:
+        result = result + roll
+    return result
+
+
+# Not cached, as the formulas come from whichever ruleset is loaded
+def level_hp_dist(hitDie, level, base, conMod=0, role=None, **values):
+    """
+    Distribution of a character's hitpoints at a level, as given by
+    modifier_assign at level 1 and a hit die roll each level_up after that,
+    through the Hitpoints and Level Hitpoints formulas of the ruleset.
+
+    hitDie can be the number of sides or dice notation like "D10". base and
+    conMod are HitpointsBase and Constitution_mod. Values for any other
+    names the formulas use can be given too, and the ProficiencyBonus at
+    each level is taken from role's RoleProgression.
+    """
+    rules = rpgSystem.rules
+    if isinstance(hitDie, str):
+        die = rpgDice.compile_roll(hitDie).distribution()
+    else:
+        die = dice_dist(hitDie)
+    values = dict(values, HitpointsBase=base, Constitution_mod=conMod)
+    progression = None if role is None else rpgSystem.role_progression(role)
+
+    def at_level(lvl):
+        """ values, with the Level and ProficiencyBonus at lvl."""
+        levelValues = dict(values, Level=lvl)
+        if progression is not None:
+            levelValues["ProficiencyBonus"] = progression.proficiencyBonus[lvl]
+        return levelValues
+
+    hp = constant(int(rules.Formulas["Hitpoints"](at_level(1))))
+    formula = rules.Formulas["Level Hitpoints"]
+    for lvl in range(2, level + 1):
+        levelValues = at_level(lvl)
+
+        def gained(roll):
+            levelValues["HitDie"] = roll
+            return int(formula(levelValues))
+
+        hp = hp + die.apply(gained)
+    return hp
@@ -0,0 +1,842 @@
+# -*- coding: utf-8 -*-
+"""
+Other ways of saving and loading Characters, alongside saveChar/load_char.
+
+@author: auto-nom
+"""
+
+import json
+import os
+import struct
+import threading
+import zlib
+from functools import partial
+
+import rpgSystem as rs
+import rpgDice as rd
+import rpgBuilder as rb
+
+
+# Setter for each key of Character.getCharDict, to apply saved values
+CHAR_SETTERS = {
+    "Name": "setName",
+    "Race": "setRace",
+    "Role": "setRole",
+    "Background": "setBackground",
+    "Attributes": "setAttribDict",
+    "Hitpoints": "setHitpoints",
+    "SpecialRules": "setSpecialRules",
+    "Equipment": "setEquipment",
+    "Languages": "setLanguages",
+    "Proficiencies": "setProficiencies",
+    "Size": "setSize",
+    "Speed": "setSpeed",
+    "Level": "setLevel",
+    "XP": "setXP",
+    "AC": "setAC",
+    "Proficiency Bonus": "setProficiencyBonus"
+    }
+
+
+def apply_char_dict(player, charDict):
+    """ Set each value in a (possibly partial) getCharDict dictionary."""
+    for key, value in charDict.items():
+        try:
+            setter = CHAR_SETTERS[key]
+        except KeyError:
+            raise KeyError("Characters have no " + str(key) + " field") from None
+        getattr(player, setter)(value)
+    if "Attributes" in charDict:
+        player.set_mods()
+
+
+def char_from_dict(charDict):
+    """ Make a Character from a whole getCharDict dictionary."""
+    return rs.Character.from_dict(charDict)
+
+
+# ---------------------------------------------------------------------------
+# Saving in the background, so nothing has to wait on the disk
+class SaveQueue(object):
+    """
+    Saves characters on a background thread, like saveChar with overwrite.
+
+    save only takes a copy of the character and returns straight away. If
+    a file is saved again before it has been written, only the latest
+    version is written. Everything waiting is written in one batch: all
+    the files are written and synced to disk first, then each is
+    atomically renamed into place.
+
+    onSaved(filename) and onError(filename, error) are called from the
+    background thread after each file. Errors from them are printed
+    rather than stopping the thread.
+    """
+
+    def __init__(self, onSaved=None, onError=None):
+        self.onSaved = onSaved
+        self.onError = onError
+        # Files waiting to be written, in the order they were saved
+        self._pending = {}
+        self._writing = False
+        self._closed = False
+        self._lock = threading.Condition()
+        self._thread = threading.Thread(target=self._run, daemon=True)
+        self._thread.start()
+
+    def save(self, player, filename="default"):
+        """ Queue a Character, or a getCharDict dictionary, to be saved."""
+        charDict = player if isinstance(player, dict) else player.getCharDict()
+        if filename == "default":
+            filename = charDict["Name"]
+        with self._lock:
+            if self._closed:
+                raise ValueError("Can't save to a closed SaveQueue")
+            if not self._thread.is_alive():
+                raise RuntimeError("The SaveQueue's writer thread has stopped")
+            # Saving again replaces the version waiting to be written
+            self._pending.pop(filename, None)
+            self._pending[filename] = charDict
+            self._lock.notify_all()
+
+    def _run(self):
+        while True:
+            with self._lock:
+                while not self._pending and not self._closed:
+                    self._lock.wait()
+                if not self._pending:
+                    return
+                batch = self._pending
+                self._pending = {}
+                self._writing = True
+            try:
+                self._write(batch)
+            except Exception as err:
+                # Keep the thread going, or nothing else would be written
+                print("Could not save", len(batch), "files:", str(err))
+            finally:
+                with self._lock:
+                    self._writing = False
+                    self._lock.notify_all()
+
+    def _write(self, batch):
+        """
+        Write a batch of files, syncing them all to disk before any is
+        renamed into place.
+        """
+        temps = {}
+        for filename, charDict in batch.items():
+            temp = None
+            try:
+                temp = rs.write_temp(filename, rs.char_json(charDict))
+                with open(temp, 'rb') as f:
+                    os.fsync(f.fileno())
+            except Exception as err:
+                if temp is not None:
+                    os.remove(temp)
+                self._failed(filename, err)
+            else:
+                temps[filename] = temp
+
+        for filename, temp in temps.items():
+            try:
+                os.replace(temp, filename)
+            except Exception as err:
+                try:
+                    os.remove(temp)
+                except OSError:
+                    pass
+                self._failed(filename, err)
+            else:
+                self._notify(self.onSaved, filename)
+
+    def _failed(self, filename, err):
+        if self.onError is not None:
+            self._notify(self.onError, filename, err)
+        else:
+            print("Could not save", str(filename) + ":", str(err))
+
+    def _notify(self, callback, *args):
+        """ Call onSaved or onError, without letting it stop the thread."""
+        if callback is None:
+            return
+        try:
+            callback(*args)
+        except Exception as err:
+            print("Error in SaveQueue callback:", str(err))
+
+    def pending(self):
+        """ How many files are waiting to be written."""
+        with self._lock:
+            return len(self._pending) + self._writing
+
+    def flush(self):
+        """ Wait until everything saved so far has been written."""
+        with self._lock:
+            while self._pending or self._writing:
+                if not self._thread.is_alive():
+                    raise RuntimeError("The SaveQueue's writer thread has "
+                                       "stopped")
+                self._lock.wait(0.1)
+
+    def close(self):
+        """ Write everything still waiting, then stop the thread."""
+        with self._lock:
+            self._closed = True
+            self._lock.notify_all()
+        self._thread.join()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+
+# ---------------------------------------------------------------------------
+# Delta saves: a base record followed by patches of just the fields changed
+# by each save, squashed back into one base record every so often
+MAX_PATCHES = 64
+
+
+def _read_delta(filename):
+    """
+    The state saved in a delta save file, how many patches it has, and
+    where its last complete line ends.
+    """
+    with open(filename, 'rb') as f:
+        data = f.read()
+    state = None
+    patches = 0
+    pos = end = 0
+    while True:
+        # Every record ends in a newline, so anything after the last one
+        # is a half written record from a crash, and is left out
+        newline = data.find(b"\n", pos)
+        if newline == -1:
+            break
+        line = data[pos:newline]
+        pos = end = newline + 1
+        if not line.strip():
+            continue
+        try:
+            entry = json.loads(line)
+        except ValueError:
+            raise ValueError(str(filename) + " is not a delta save") from None
+        if "Base" in entry:
+            state = entry["Base"]
+            patches = 0
+        elif state is None:
+            raise ValueError(str(filename) + " has no base record")
+        else:
+            state.update(entry["Set"])
+            patches += 1
+    if state is None:
+        raise ValueError(str(filename) + " has no base record")
+    return state, patches, end
+
+
+def load_delta(filename):
+    """ Load the Character in a delta save file."""
+    return char_from_dict(_read_delta(filename)[0])
+
+
+class DeltaSave(object):
+    """
+    Saves one character to a file over and over, writing only the fields
+    that changed since the last save.
+
+    The file starts with a base record of the whole character, and each
+    save appends a patch of the changed fields. Once there are maxPatches
+    patches, a new base record is written in the background and renamed
+    over the file, so loading never has many patches to replay.
+    """
+
+    def __init__(self, filename, maxPatches=MAX_PATCHES, sync=False):
+        self.filename = filename
+        self.maxPatches = maxPatches
+        self.sync = sync
+        self._lock = threading.Lock()
+        self._compactor = None
+        # Patches appended while a compaction was running, to carry over
+        self._since = None
+        if os.path.exists(filename):
+            self.state, self.patches, end = _read_delta(filename)
+            # Cut off any half written record, so saves append after the
+            # last complete one rather than onto the end of it
+            if os.path.getsize(filename) > end:
+                with open(filename, 'r+b') as f:
+                    f.truncate(end)
+        else:
+            self.state, self.patches = None, 0
+
+    def save(self, player):
+        """
+        Save a Character, or a getCharDict dictionary. Returns the number
+        of fields written.
+        """
+        charDict = player if isinstance(player, dict) else player.getCharDict()
+        with self._lock:
+            if self.state is None:
+                rs.write_file(self.filename, self._line({"Base": charDict}))
+                self.state = dict(charDict)
+                return len(charDict)
+
+            changes = {k: v for k, v in charDict.items()
+                       if self.state.get(k) != v}
+            if not changes:
+                return 0
+            line = self._line({"Set": changes})
+            with open(self.filename, 'a') as f:
+                f.write(line)
+                if self.sync:
+                    f.flush()
+                    os.fsync(f.fileno())
+            self.state.update(changes)
+            self.patches += 1
+            if self._since is not None:
+                self._since.append(line)
+
+        if self.patches >= self.maxPatches:
+            self.compact()
+        return len(changes)
+
+    def _line(self, entry):
+        return json.dumps(entry, separators=(',', ':')) + "\n"
+
+    def compact(self, wait=False):
+        """
+        Rewrite the file as one base record, in the background unless wait.
+        """
+        while True:
+            with self._lock:
+                running = self._compactor
+                if running is None:
+                    if self.state is None:
+                        return
+                    self._since = []
+                    compactor = self._compactor = threading.Thread(
+                        target=self._compact, args=(dict(self.state),),
+                        daemon=True)
+                    compactor.start()
+                    break
+            # Already compacting, so only wait to start again if asked to
+            if not wait:
+                return
+            running.join()
+        if wait:
+            compactor.join()
+
+    def _compact(self, state):
+        temp = None
+        try:
+            # The slow part, writing and syncing the whole character, is
+            # done while saves carry on appending to the old file
+            temp = rs.write_temp(self.filename, self._line({"Base": state}))
+            with open(temp, 'rb') as f:
+                os.fsync(f.fileno())
+            # So only the patches saved since then are synced holding the lock
+            with self._lock:
+                if self._since:
+                    with open(temp, 'a') as f:
+                        f.writelines(self._since)
+                        f.flush()
+                        os.fsync(f.fileno())
+                os.replace(temp, self.filename)
+                temp = None
+                self.patches = len(self._since)
+        except OSError as err:
+            print("Could not compact", str(self.filename) + ":", str(err))
+        finally:
+            if temp is not None:
+                try:
+                    os.remove(temp)
+                except OSError:
+                    pass
+            with self._lock:
+                self._since = None
+                self._compactor = None
+
+    def getCharacter(self):
+        """ The Character as last saved."""
+        with self._lock:
+            if self.state is None:
+                return None
+            return char_from_dict(self.state)
+
+
+# ---------------------------------------------------------------------------
+# Rosters: any number of characters in one file, one compact json object per
+# line, so they can be written and read one at a time in constant memory
+ROSTER_BUFFER = 1 << 16
+
+
+class RosterWriter(object):
+    """
+    Writes characters to a roster file as they are given, through a buffer.
+
+    Use it as a context manager, or call close when done:
+        with RosterWriter("npcs.jsonl") as roster:
+            for player in players:
+                roster.write(player)
+    """
+
+    def __init__(self, filename, append=False):
+        self.filename = filename
+        self.count = 0
+        self._file = open(filename, 'a' if append else 'w',
+                          buffering=ROSTER_BUFFER)
+        self._encode = json.JSONEncoder(separators=(',', ':')).encode
+
+    def write(self, player):
+        """ Add a Character, or a getCharDict dictionary, to the roster."""
+        if not isinstance(player, dict):
+            player = player.getCharDict()
+        self._file.write(self._encode(player))
+        self._file.write("\n")
+        self.count += 1
+
+    def close(self):
+        self._file.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+
+def save_roster(players, filename, append=False):
+    """
+    Save any number of characters to a roster file, one per line.
+
+    players can be a generator, so they never all have to be in memory.
+    Returns how many were saved.
+    """
+    with RosterWriter(filename, append) as roster:
+        for player in players:
+            roster.write(player)
+    return roster.count
+
+
+def iter_roster(filename, raw=False):
+    """
+    Read the characters in a roster file one at a time, as a generator.
+
+    With raw the getCharDict dictionaries are given rather than Characters.
+    """
+    with open(filename, 'r', buffering=ROSTER_BUFFER) as f:
+        for lineNum, line in enumerate(f, 1):
+            if not line.strip():
+                continue
+            try:
+                charDict = json.loads(line)
+            except ValueError as err:
+                raise ValueError("Line " + str(lineNum) + " of " +
+                                 str(filename) + " is not a character: " +
+                                 str(err)) from None
+            yield charDict if raw else char_from_dict(charDict)
+
+
+def load_roster(filename):
+    """ Load every character in a roster file into a list."""
+    return list(iter_roster(filename))
+
+
+# ---------------------------------------------------------------------------
+# Loading a whole folder of saveChar files at once, across processes
+LOAD_CHUNK = 32
+
+
+def save_files(directory):
+    """
+    The save files in a directory, in name order. saveChar names files
+    after the character by default, so every file that isn't hidden counts.
+    """
+    return sorted(os.path.join(directory, f) for f in os.listdir(directory)
+                  if not f.startswith(".") and
+                  os.path.isfile(os.path.join(directory, f)))
+
+
+def _load_chunk(filenames):
+    """
+    Load some save files, for load_many. Returns (filename, Character,
+    None) for each, or (filename, None, error message) if it can't be.
+    """
+    results = []
+    for filename in filenames:
+        try:
+            with open(filename, 'r') as f:
+                charDict = json.load(f)
+            if not isinstance(charDict, dict):
+                raise ValueError("not a saved character")
+            results.append((filename, rs.Character.from_dict(charDict), None))
+        except Exception as err:
+            # Whatever is wrong with one file, the rest still get loaded
+            results.append((filename, None, str(err) or type(err).__name__))
+    return results
+
+
+def load_many(paths, workers=None, ordered=True, chunk=LOAD_CHUNK):
+    """
+    Load many saveChar files, parsing and building them across worker
+    processes. paths is a directory or a list of files.
+
+    A generator of (filename, Character, None) for each file, or
+    (filename, None, error message) for one that couldn't be loaded, so
+    one bad file doesn't stop the rest. They come in the order of paths,
+    or as soon as they're loaded if ordered is False.
+    """
+    if isinstance(paths, (str, bytes, os.PathLike)):
+        paths = save_files(paths)
+    paths = list(paths)
+    chunks = [paths[i:i + chunk] for i in range(0, len(paths), chunk)]
+    if workers is None:
+        workers = os.cpu_count() or 1
+    workers = max(1, min(workers, len(chunks)))
+
+    if workers == 1:
+        for results in map(_load_chunk, chunks):
+            yield from results
+        return
+
+    # Imported here as it is slow to import and rarely needed
+    from concurrent.futures import ProcessPoolExecutor, as_completed
+    pool = ProcessPoolExecutor(workers)
+    try:
+        if ordered:
+            for results in pool.map(_load_chunk, chunks):
+                yield from results
+        else:
+            futures = [pool.submit(_load_chunk, c) for c in chunks]
+            for future in as_completed(futures):
+                yield from future.result()
+    finally:
+        # Stopping early, e.g. cancelled by the user, drops what's left
+        pool.shutdown(wait=False, cancel_futures=True)
+
+
+# ---------------------------------------------------------------------------
+# Binary saves: only what can't be worked out again from the ruleset is
+# stored, as indexes into the ruleset and numbers, plus a small json diff of
+# anything else that differs from a new character of that race, role,
+# background and level
+BINARY_MAGIC = b"RPGB"
+# Bump this whenever the layout of the binary format changes
+BINARY_VERSION = 1
+
+# Magic, format version and a checksum of the ruleset the indexes are into
+_HEADER = struct.Struct("<4sHI")
+# Race, role, background, level, XP, hitpoints, AC, name and diff lengths,
+# followed by the name, ability scores (see _scores_struct) and diff
+_RECORD = struct.Struct("<HHHBihhHI")
+
+# Fields that come from the ruleset, so are only saved if they differ from it
+DERIVED_FIELDS = ("SpecialRules", "Equipment", "Languages", "Proficiencies",
+                  "Size", "Speed", "Proficiency Bonus")
+
+
+def _checksum(data):
+    """ A checksum of some ruleset data, to tell if it has changed."""
+    return zlib.crc32(json.dumps(data, sort_keys=True).encode())
+
+
+def _binary_tables():
+    """
+    What binary saves need from the ruleset, worked out once: a checksum of
+    the data they depend on, the indexes of races, roles and backgrounds,
+    the layout of the ability scores, and reference characters to diff
+    against.
+    """
+    rules = rs.rules
+    try:
+        return rules.derived["binaryTables"]
+    except KeyError:
+        pass
+    data = [rules.Attributes, rules.Races, rules.Roles, rules.Backgrounds,
+            rules.RaceStats, rules.RoleStats, rules.BackgroundStats,
+            rules.rpgData["Proficiency Types"]]
+    tables = {
+        "checksum": _checksum(data),
+        "races": {r: i for i, r in enumerate(rules.Races)},
+        "roles": {r: i for i, r in enumerate(rules.Roles)},
+        "backgrounds": {b: i for i, b in enumerate(rules.Backgrounds)},
+        "scores": struct.Struct("<" + "h" * len(rules.Attributes)),
+        "references": {}
+        }
+    rules.derived["binaryTables"] = tables
+    return tables
+
+
+def _reference(race, role, background, level):
+    """ getCharDict of a new character of a race, role, background and level."""
+    references = _binary_tables()["references"]
+    key = (race, role, background, level)
+    try:
+        return references[key]
+    except KeyError:
+        player = rs.Character("", race, role, background)
+        player.setLevelRules(level)
+        references[key] = player.getCharDict()
+        return references[key]
+
+
+def _fits(value, low, high):
+    return type(value) is int and low <= value <= high
+
+
+def encode_char(player):
+    """ A Character as a binary save record."""
+    tables = _binary_tables()
+    rules = rs.rules
+    charDict = player.getCharDict()
+    diff = {}
+
+    try:
+        indexes = (tables["races"][charDict["Race"]],
+                   tables["roles"][charDict["Role"]],
+                   tables["backgrounds"][charDict["Background"]])
+    except KeyError as err:
+        raise ValueError(str(err) + " is not in the ruleset, so can't be " +
+                         "saved in a binary save") from None
+
+    # Anything that doesn't fit in its slot is saved in the diff instead
+    level = charDict["Level"]
+    maxLevel = rs.role_progression(charDict["Role"]).maxLevel
+    if not _fits(level, 1, maxLevel):
+        diff["Level"] = level
+        level = 1
+    numbers = []
+    for key, low, high in (("XP", -2**31, 2**31 - 1),
+                           ("Hitpoints", -2**15, 2**15 - 1),
+                           ("AC", -2**15, 2**15 - 1)):
+        if _fits(charDict[key], low, high):
+            numbers.append(charDict[key])
+        else:
+            diff[key] = charDict[key]
+            numbers.append(0)
+
+    attribs = charDict["Attributes"]
+    if (len(attribs) == len(rules.Attributes) and
+            all(_fits(attribs.get(a), -2**15, 2**15 - 1)
+                for a in rules.Attributes)):
+        scores = [attribs[a] for a in rules.Attributes]
+    else:
+        diff["Attributes"] = attribs
+        scores = [0] * len(rules.Attributes)
+
+    name = charDict["Name"]
+    if not isinstance(name, str):
+        diff["Name"] = name
+        name = ""
+
+    reference = _reference(charDict["Race"], charDict["Role"],
+                           charDict["Background"], level)
+    for key in DERIVED_FIELDS:
+        if charDict[key] != reference[key]:
+            diff[key] = charDict[key]
+
+    name = name.encode()
+    diff = json.dumps(diff, separators=(',', ':')).encode() if diff else b""
+    return b"".join((_RECORD.pack(*indexes, level, *numbers, len(name),
+                                  len(diff)),
+                     name, tables["scores"].pack(*scores), diff))
+
+
+def _decode_char(record, name, scores, diff):
+    """ The Character from the parts of a binary save record."""
+    rules = rs.rules
+    race, role, background, level, xp, hitpoints, AC = record[:7]
+    player = rs.Character(name.decode(), rules.Races[race], rules.Roles[role],
+                          rules.Backgrounds[background])
+    player.setLevelRules(level)
+    for a, score in zip(rules.Attributes, scores):
+        player.setAttrib(a, score)
+    player.set_mods()
+    player.setHitpoints(hitpoints)
+    player.setAC(AC)
+    player.setXP(xp)
+    if diff:
+        apply_char_dict(player, json.loads(diff))
+    return player
+
+
+def save_binary(players, filename):
+    """
+    Save characters to a binary save file, which is far smaller than json.
+
+    The file can only be loaded with the same ruleset it was saved with.
+    Returns how many were saved.
+    """
+    count = 0
+    with open(filename, 'wb', buffering=ROSTER_BUFFER) as f:
+        f.write(_HEADER.pack(BINARY_MAGIC, BINARY_VERSION,
+                             _binary_tables()["checksum"]))
+        for player in players:
+            f.write(encode_char(player))
+            count += 1
+    return count
+
+
+def iter_binary(filename):
+    """ Read the characters in a binary save file one at a time."""
+    tables = _binary_tables()
+    scoresStruct = tables["scores"]
+    with open(filename, 'rb', buffering=ROSTER_BUFFER) as f:
+        header = f.read(_HEADER.size)
+        if len(header) < _HEADER.size:
+            raise ValueError(str(filename) + " is not a binary save")
+        magic, version, checksum = _HEADER.unpack(header)
+        if magic != BINARY_MAGIC:
+            raise ValueError(str(filename) + " is not a binary save")
+        if version != BINARY_VERSION:
+            raise ValueError(str(filename) + " is binary save version " +
+                             str(version) + ", but this is version " +
+                             str(BINARY_VERSION))
+        if checksum != tables["checksum"]:
+            raise ValueError(str(filename) + " was saved with different " +
+                             "DATA files, so can't be loaded")
+
+        while True:
+            fixed = f.read(_RECORD.size)
+            if not fixed:
+                return
+            if len(fixed) < _RECORD.size:
+                raise ValueError(str(filename) + " is cut short")
+            record = _RECORD.unpack(fixed)
+            nameLen, diffLen = record[7:]
+            rest = f.read(nameLen + scoresStruct.size + diffLen)
+            if len(rest) < nameLen + scoresStruct.size + diffLen:
+                raise ValueError(str(filename) + " is cut short")
+            scores = scoresStruct.unpack_from(rest, nameLen)
+            yield _decode_char(record, rest[:nameLen], scores,
+                               rest[nameLen + scoresStruct.size:])
+
+
+def load_binary(filename):
+    """ Load every character in a binary save file into a list."""
+    return list(iter_binary(filename))
+
+
+# ---------------------------------------------------------------------------
+# Seeded characters: store just the seed random_gen used and any edits made
+# since, then rebuild the rest of the character when it is needed
+def _seed_checksum():
+    """
+    Checksum of all the DATA random_gen uses, worked out once, as changing
+    any of it changes the character a seed makes.
+    """
+    rules = rs.rules
+    try:
+        return rules.derived["seedChecksum"]
+    except KeyError:
+        checksum = rules.derived["seedChecksum"] = _checksum(
+            [rules.rpgData, rules.namesData, rules.statsData])
+        return checksum
+
+
+def seed_record(seed, key=(), overrides=None):
+    """ The compact record a seeded character is saved as."""
+    return {"Seed": seed,
+            "Key": list(key),
+            "Version": rb.GENERATOR_VERSION,
+            "Ruleset": _seed_checksum(),
+            "Overrides": overrides or {}}
+
+
+def regenerate(record):
+    """ Rebuild the full Character from a seed record."""
+    if record["Version"] != rb.GENERATOR_VERSION:
+        raise ValueError("Seeded character was made by generator version " +
+                         str(record["Version"]) + ", but this is version " +
+                         str(rb.GENERATOR_VERSION))
+    if record.get("Ruleset") != _seed_checksum():
+        raise ValueError("Seeded character was made with different DATA " +
+                         "files, so would not regenerate the same")
+    player = rb.random_gen(rd.DiceRNG(record["Seed"], record["Key"]))
+    apply_char_dict(player, record["Overrides"])
+    return player
+
+
+class LazyCharacter(object):
+    """
+    Stands in for a Character that is only made, by calling load, the first
+    time something on it is used, after which this behaves just like the
+    Character.
+    """
+
+    # Attributes of the stand-in itself, never looked up on the Character
+    _OWN = ("_load", "_char")
+
+    def __init__(self, load):
+        self._load = load
+        self._char = None
+
+    def getCharacter(self):
+        """ The full Character, made if it hasn't been already."""
+        if self._char is None:
+            self._char = self._load()
+        return self._char
+
+    def __getattr__(self, name):
+        # Only called for things not on the stand-in itself
+        if name.startswith("__") or name in self._OWN:
+            raise AttributeError(name)
+        return getattr(self.getCharacter(), name)
+
+    def __str__(self):
+        return str(self.getCharacter())
+
+
+class SeededCharacter(LazyCharacter):
+    """
+    A Character stored as just the seed it was randomly generated from,
+    only regenerated the first time something on it is used.
+    """
+
+    _OWN = ("_record",) + LazyCharacter._OWN
+
+    def __init__(self, seed=None, key=(), overrides=None):
+        if seed is None:
+            seed = rd.DiceRNG().seed
+        self._record = seed_record(seed, key, overrides)
+        super().__init__(partial(regenerate, self._record))
+
+    @classmethod
+    def from_record(cls, record):
+        seeded = cls.__new__(cls)
+        seeded._record = record
+        LazyCharacter.__init__(seeded, partial(regenerate, record))
+        return seeded
+
+    def getRecord(self):
+        """
+        The seed record, with any changes made to the character since it
+        was generated stored as overrides.
+        """
+        if self._char is None:
+            return dict(self._record)
+        generated = rb.random_gen(rd.DiceRNG(self._record["Seed"],
+                                             self._record["Key"])).getCharDict()
+        overrides = {k: v for k, v in self._char.getCharDict().items()
+                     if generated[k] != v}
+        return seed_record(self._record["Seed"], self._record["Key"],
+                           overrides)
+
+
+def save_seeded(players, filename):
+    """ Save SeededCharacters to a file, one seed record per line."""
+    with open(filename, 'w') as f:
+        for player in players:
+            f.write(json.dumps(player.getRecord(), separators=(',', ':')))
+            f.write("\n")
+
+
+def load_seeded(filename):
+    """
+    Load the SeededCharacters in a file made by save_seeded.
+
+    None of the characters are regenerated until they are used.
+    """
+    with open(filename, 'r') as f:
+        return [SeededCharacter.from_record(json.loads(line))
+                for line in f if line.strip()]
@@ -0,0 +1,254 @@
+# -*- coding: utf-8 -*-
+"""
+CharacterStore, a sqlite database of characters that can be searched
+without loading every one of them.
+
+e.g. every level 5+ Dwarf Fighter:
+    store.query(race="Dwarf", role="Fighter", level=(5, None))
+
+@author: auto-nom
+"""
+
+import json
+import sqlite3
+from functools import partial
+
+import rpgSystem as rs
+import rpgSave as rsv
+
+# Characters are added in transactions of this many by add_many
+BATCH_SIZE = 1000
+
+
+def _quoted(column):
+    """ A column name safe to put in sql, as attributes come from DATA."""
+    return '"' + column.replace('"', '""') + '"'
+
+
+class StoredCharacter(rsv.LazyCharacter):
+    """
+    A Character in a CharacterStore, as returned by CharacterStore.query.
+
+    Only the indexed columns are read to begin with; the full Character is
+    loaded the first time anything else on it is used.
+    """
+
+    # The columns read by query, kept apart from the Character's own
+    # attributes so those are always read from the loaded Character
+    _OWN = ("_name", "_race", "_role", "_background", "_lvl") + \
+        rsv.LazyCharacter._OWN
+
+    def __init__(self, store, charId, name, race, role, background, level):
+        super().__init__(partial(store.get, charId))
+        self.store = store
+        self.id = charId
+        self._name = name
+        self._race = race
+        self._role = role
+        self._background = background
+        self._lvl = level
+
+    # Until the Character is loaded, and may have been changed, the
+    # getters give the columns read by query
+
+    def getName(self):
+        if self._char is not None:
+            return self._char.getName()
+        return self._name
+
+    def getRace(self):
+        if self._char is not None:
+            return self._char.getRace()
+        return self._race
+
+    def getRole(self):
+        if self._char is not None:
+            return self._char.getRole()
+        return self._role
+
+    def getBackground(self):
+        if self._char is not None:
+            return self._char.getBackground()
+        return self._background
+
+    def getLevel(self):
+        if self._char is not None:
+            return self._char.getLevel()
+        return self._lvl
+
+
+class CharacterStore(object):
+    """
+    Characters saved in a sqlite database, with indexed columns for race,
+    role, background, level, XP and each ability score so they can be
+    searched quickly. The rest of each character is saved as json.
+
+    Without create, filename must already be a CharacterStore; anything
+    else is a ValueError rather than having the table added to it. A file
+    that isn't a database raises sqlite3.DatabaseError.
+    """
+
+    SUMMARY = ("id", "name", "race", "role", "background", "level")
+
+    def __init__(self, filename=":memory:", create=True):
+        self.filename = filename
+        self.attributes = tuple(rs.rules.Attributes)
+        self._db = sqlite3.connect(filename)
+        try:
+            if create:
+                self._create()
+            elif not self._db.execute(
+                    "SELECT 1 FROM sqlite_master "
+                    "WHERE type = 'table' AND name = 'characters'").fetchone():
+                raise ValueError(str(filename) + " is not a CharacterStore")
+        except BaseException:
+            self._db.close()
+            raise
+
+    def _create(self):
+        """ Make the table and its indexes, if they don't exist already."""
+        scores = "".join(", " + _quoted(a) + " INTEGER"
+                         for a in self.attributes)
+        with self._db:
+            self._db.execute(
+                "CREATE TABLE IF NOT EXISTS characters ("
+                "id INTEGER PRIMARY KEY, name TEXT, race TEXT, role TEXT, "
+                "background TEXT, level INTEGER, xp INTEGER" + scores +
+                ", data TEXT NOT NULL)")
+            for column in ("race", "role", "background", "level", "xp",
+                           *self.attributes):
+                self._db.execute(
+                    "CREATE INDEX IF NOT EXISTS " +
+                    _quoted("characters_" + column) + " ON characters (" +
+                    _quoted(column) + ")")
+            # Most searches are for a race and role, then a level
+            self._db.execute(
+                "CREATE INDEX IF NOT EXISTS characters_race_role_level "
+                "ON characters (race, role, level)")
+
+    def _row(self, player):
+        """ The values of a character's row, in column order after id."""
+        charDict = player.getCharDict()
+        attribs = charDict["Attributes"]
+        return ((charDict["Name"], charDict["Race"], charDict["Role"],
+                 charDict["Background"], charDict["Level"], charDict["XP"]) +
+                tuple(attribs.get(a) for a in self.attributes) +
+                (json.dumps(charDict, separators=(',', ':')),))
+
+    def _insert_sql(self):
+        columns = ("name", "race", "role", "background", "level", "xp",
+                   *self.attributes, "data")
+        return ("INSERT INTO characters (" +
+                ", ".join(_quoted(c) for c in columns) + ") VALUES (" +
+                ", ".join("?" * len(columns)) + ")")
+
+    def add(self, player):
+        """ Add a Character to the store, returning its id."""
+        with self._db:
+            return self._db.execute(self._insert_sql(),
+                                    self._row(player)).lastrowid
+
+    def add_many(self, players, batchSize=BATCH_SIZE):
+        """
+        Add many Characters, such as from rpgBuilder.random_gen, in
+        transactions of batchSize. players can be a generator.
+        Returns how many were added.
+        """
+        sql = self._insert_sql()
+        count = 0
+        batch = []
+        for player in players:
+            batch.append(self._row(player))
+            if len(batch) == batchSize:
+                with self._db:
+                    self._db.executemany(sql, batch)
+                count += len(batch)
+                batch = []
+        if batch:
+            with self._db:
+                self._db.executemany(sql, batch)
+            count += len(batch)
+        return count
+
+    def update(self, charId, player):
+        """ Replace the character saved with an id."""
+        columns = ("name", "race", "role", "background", "level", "xp",
+                   *self.attributes, "data")
+        with self._db:
+            self._db.execute(
+                "UPDATE characters SET " +
+                ", ".join(_quoted(c) + " = ?" for c in columns) +
+                " WHERE id = ?", self._row(player) + (charId,))
+
+    def remove(self, charId):
+        with self._db:
+            self._db.execute("DELETE FROM characters WHERE id = ?", (charId,))
+
+    def get(self, charId):
+        """ The full Character saved with an id."""
+        row = self._db.execute("SELECT data FROM characters WHERE id = ?",
+                               (charId,)).fetchone()
+        if row is None:
+            raise KeyError("No character with id " + str(charId))
+        return rsv.char_from_dict(json.loads(row[0]))
+
+    def query(self, name=None, race=None, role=None, background=None,
+              level=None, xp=None, limit=None, **scores):
+        """
+        Find the characters matching everything given, as StoredCharacters
+        that are only fully loaded when used.
+
+        Numbers, like level or an ability score such as Strength=16, can
+        also be given as a (lowest, highest) range, with None for no limit,
+        e.g. level=(5, None) for level 5 and up.
+        """
+        # Checked now, not when the results are first read
+        for a in scores:
+            if a not in self.attributes:
+                raise KeyError(str(a) + " is not an attribute of the ruleset")
+
+        where = []
+        params = []
+        for column, value in (("name", name), ("race", race), ("role", role),
+                              ("background", background), ("level", level),
+                              ("xp", xp), *scores.items()):
+            if value is None:
+                continue
+            if isinstance(value, (tuple, list)):
+                low, high = value
+                if low is not None:
+                    where.append(_quoted(column) + " >= ?")
+                    params.append(low)
+                if high is not None:
+                    where.append(_quoted(column) + " <= ?")
+                    params.append(high)
+            else:
+                where.append(_quoted(column) + " = ?")
+                params.append(value)
+
+        sql = "SELECT " + ", ".join(self.SUMMARY) + " FROM characters"
+        if where:
+            sql += " WHERE " + " AND ".join(where)
+        sql += " ORDER BY id"
+        if limit is not None:
+            sql += " LIMIT ?"
+            params.append(limit)
+
+        # Rows are turned into StoredCharacters as they are read
+        return (StoredCharacter(self, *row)
+                for row in self._db.execute(sql, params))
+
+    def __len__(self):
+        return self._db.execute("SELECT COUNT(*) FROM characters").fetchone()[0]
+
+    def __iter__(self):
+        return self.query()
+
+    def close(self):
+        self._db.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
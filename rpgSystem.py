@@ -6,21 +6,27 @@ Functions for character generation, and the Character class, for an rpg.
 @author: auto-nom
 """
 
+import ast
+import os
 import random
 import json
+import pickle
+import tempfile
+from array import array
+from collections.abc import Mapping
+from types import MappingProxyType
 
+import rpgDice as rd
 
-def dice(sides, num=1):
+
+def dice(sides, num=1, rng=None):
     """ Rolls num dice with a specified number of sides."""
-    total = 0
-    for i in range(num):
-        total += random.randint(1, sides)
-    return total
+    return sum(rd.roll_dice(sides, num, rng))
 
 
-def d20():
+def d20(rng=None):
     """ Rolls a 20 sided dice with crit success and crit fail print-outs."""
-    roll = random.randint(1, 20)
+    roll = dice(20, rng=rng)
     if roll == 20:
         print("CRITICAL SUCCESS!")
     if roll == 1:
@@ -28,115 +34,585 @@ def d20():
     return roll
 
 
-def load_data():
+# Where the data files are kept, found from here rather than the working dir
+DATA_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "DATA")
+DATA_FILES = ("rpgData.json", "namesData.json", "statsData.json")
+
+# The parsed data is cached in this file in the data directory, bump the
+# version whenever what Ruleset builds from the data changes
+CACHE_FILE = "ruleset.cache"
+CACHE_VERSION = 5
+
+# Formulas for derived stats, used for any the Formulas section of
+# statsData.json doesn't give
+DEFAULT_FORMULAS = {
+    "AC": "10 + Dexterity_mod",
+    "Hitpoints": "HitpointsBase + Constitution_mod",
+    "Level Hitpoints": "HitDie + Constitution_mod"
+    }
+
+
+def load_data(dataDir=DATA_DIR):
     """ Loads the various data files needed for the program."""
-    with open("DATA/rpgData.json", 'r') as rpgd:
+    with open(os.path.join(dataDir, "rpgData.json"), 'r') as rpgd:
         rpgData = json.load(rpgd)
 
-    with open("DATA/namesData.json", 'r') as rpgn:
+    with open(os.path.join(dataDir, "namesData.json"), 'r') as rpgn:
         namesData = json.load(rpgn)
 
-    with open("DATA/statsData.json", 'r') as rpgs:
+    with open(os.path.join(dataDir, "statsData.json"), 'r') as rpgs:
         statsData = json.load(rpgs)
 
     return rpgData, namesData, statsData
 
 
-# Load the data so it can be used in this file
-rpgData, namesData, statsData = load_data()
-# Create individual lists/dictionaries from data
-try:
-    Attributes = rpgData["Attributes"]
-    Races = rpgData["Races"]
-    Roles = rpgData["Roles"]
-    Backgrounds = rpgData["Backgrounds"]
-    Skills = rpgData["Skills"]
-except KeyError as err:
-    print("DATA/rpgDATA.json is missing a", str(err), "section")
-    raise
-
-try:
-    RaceStats = statsData["RaceStats"]
-    RoleStats = statsData["RoleStats"]
-    BackgroundStats = statsData["BackgroundStats"]
-except KeyError as err:
-    print("DATA/statsData/json is missing a", str(err), "section")
-    raise
+class Formula(object):
+    """
+    A formula for a derived stat from the data files, e.g. "10 + Dexterity_mod".
+
+    The text is checked and compiled into a python function once, which is
+    called with a mapping of each name in the formula to its value. The
+    values can be numbers for one Character or NumPy arrays for a whole
+    CharacterBatch.
+    """
+
+    # Formulas are just whole number arithmetic on names
+    _NODES = (ast.Expression, ast.BinOp, ast.UnaryOp, ast.Constant, ast.Name,
+              ast.Load, ast.Add, ast.Sub, ast.Mult, ast.FloorDiv, ast.UAdd,
+              ast.USub)
+
+    def __init__(self, name, text):
+        self.name = name
+        self.text = text
+        try:
+            tree = ast.parse(text.strip(), mode="eval")
+        except SyntaxError:
+            raise ValueError("Invalid " + name + " formula: " + text) from None
+
+        names = []
+        for node in ast.walk(tree):
+            if (not isinstance(node, self._NODES) or
+                    isinstance(node, ast.Constant) and
+                    type(node.value) is not int):
+                raise ValueError("Invalid " + name + " formula: " + text)
+            if isinstance(node, ast.Name) and node.id not in names:
+                names.append(node.id)
+        self.names = tuple(names)
+
+        # Safe to compile now only names and arithmetic are left
+        self._func = eval("lambda " + ", ".join(self.names) + ": " +
+                          text.strip(), {"__builtins__": {}})
+
+    def __call__(self, values):
+        try:
+            args = [values[n] for n in self.names]
+        except KeyError as err:
+            raise KeyError("No value given for " + str(err.args[0]) +
+                           " in the " + self.name + " formula") from None
+        return self._func(*args)
+
+    def __repr__(self):
+        return "Formula(" + repr(self.name) + ", " + repr(self.text) + ")"
+
+
+class Ruleset(object):
+    """
+    The game data from the DATA files, e.g. rules.Races or rules.RoleStats.
+
+    Nothing is read until the data is first used, so importing rpgSystem
+    for something like dice() doesn't have to load and parse the files.
+    """
+
+    # The data available, besides the raw rpgData, namesData and statsData
+    RPG_SECTIONS = ("Attributes", "Races", "Roles", "Backgrounds", "Skills")
+    STATS_SECTIONS = ("RaceStats", "RoleStats", "BackgroundStats")
+
+    def __init__(self, dataDir=DATA_DIR, useCache=True):
+        self.dataDir = dataDir
+        self.useCache = useCache
+        self.loaded = False
+        # CharacterTemplates made from this data, see get_template
+        self.templates = {}
+        # Anything else other modules work out from this data, by name
+        self.derived = {}
+
+    def load(self):
+        """ Load the data now, rather than when it is first used."""
+        data = None
+        if self.useCache:
+            key = self._cache_key()
+            data = self._read_cache(key)
+
+        if data is None:
+            data = self._build(*load_data(self.dataDir))
+            if self.useCache:
+                self._write_cache(key, data)
+
+        for name, value in data.items():
+            setattr(self, name, value)
+        # Each role's level table, shared by every character of that role,
+        # and the formulas. Compiled here rather than cached, as read-only
+        # views and functions can't pickle
+        self.RoleProgressions = {role: RoleProgression(role, stats)
+                                 for role, stats in self.RoleStats.items()}
+        try:
+            self.Formulas = {name: Formula(name, text)
+                             for name, text in self.FormulaTexts.items()}
+        except ValueError as err:
+            print("DATA/statsData.json has an", str(err))
+            raise
+        self.ACDepends = self._depends(self.Formulas["AC"])
+        self.templates = {}
+        self.derived = {}
+        self.loaded = True
+
+    def _depends(self, formula):
+        """
+        What a formula for a character depends on: a bit for each attribute
+        whose score or modifier it uses, and whether it uses anything else
+        that can change, like Level, rather than just role and race stats.
+        """
+        mask = 0
+        other = False
+        for name in formula.names:
+            attribute = name[:-len("_mod")] if name.endswith("_mod") else name
+            if attribute in self.AttributeIndex:
+                mask |= 1 << self.AttributeIndex[attribute]
+            elif not any(name in stats for table in (self.RoleStats,
+                                                     self.RaceStats)
+                         for stats in table.values()):
+                other = True
+        return mask, other
+
+    def _build(self, rpgData, namesData, statsData):
+        """ Check the parsed data files and pull out everything needed."""
+        data = {"rpgData": rpgData,
+                "namesData": namesData,
+                "statsData": statsData}
+
+        # Create individual lists/dictionaries from data
+        try:
+            for i in self.RPG_SECTIONS:
+                data[i] = rpgData[i]
+        except KeyError as err:
+            print("DATA/rpgDATA.json is missing a", str(err), "section")
+            raise
+
+        try:
+            for i in self.STATS_SECTIONS:
+                data[i] = statsData[i]
+        except KeyError as err:
+            print("DATA/statsData/json is missing a", str(err), "section")
+            raise
+
+        data["NamePools"] = self._name_pools(namesData, data["RaceStats"])
+        data["FormulaTexts"] = dict(DEFAULT_FORMULAS,
+                                    **statsData.get("Formulas", {}))
+
+        # Position of each attribute in a Character's scores, and the name
+        # of its modifier
+        data["AttributeIndex"] = {a: i for i, a in enumerate(data["Attributes"])}
+        data["ModNames"] = tuple(a + "_mod" for a in data["Attributes"])
+        # The skills that depend on each attribute, in the same order
+        data["SkillsByAttribute"] = tuple(
+            tuple(k for k, v in data["Skills"].items() if v == mod)
+            for mod in data["ModNames"])
+        return data
+
+    def _name_pools(self, namesData, raceStats):
+        """
+        The names each race can randomly get, from the names of each of
+        its majorRace (so Half-Elves get Elf and Human names).
+        """
+        pools = {}
+        for race in raceStats:
+            names = []
+            for i in raceStats[race]["majorRace"]:
+                try:
+                    names += namesData[i + "_names"]
+                except KeyError:
+                    names += namesData["Common_names"]
+            pools[race] = tuple(names)
+        return pools
+
+    def _cache_key(self):
+        """ Identifies the current data files, to tell if a cache is stale."""
+        key = [CACHE_VERSION]
+        for i in DATA_FILES:
+            stat = os.stat(os.path.join(self.dataDir, i))
+            key.append((i, stat.st_size, stat.st_mtime_ns))
+        return key
+
+    def _read_cache(self, key):
+        """ The cached data if it matches key, otherwise None."""
+        try:
+            with open(os.path.join(self.dataDir, CACHE_FILE), 'rb') as f:
+                cached = pickle.load(f)
+        except Exception:
+            # Missing, unreadable or corrupt caches are just rebuilt
+            return None
+        if not isinstance(cached, dict) or cached.get("key") != key:
+            return None
+        return cached["data"]
+
+    def _write_cache(self, key, data):
+        """ Save the data for next time, if the data directory is writable."""
+        path = os.path.join(self.dataDir, CACHE_FILE)
+        # Write then rename, so other processes never read half a cache
+        temp = path + "." + str(os.getpid()) + ".tmp"
+        try:
+            with open(temp, 'wb') as f:
+                pickle.dump({"key": key, "data": data}, f,
+                            pickle.HIGHEST_PROTOCOL)
+            os.replace(temp, path)
+        except OSError:
+            try:
+                os.remove(temp)
+            except OSError:
+                pass
+
+    def __getattr__(self, name):
+        # Only called for data that hasn't been loaded yet
+        if self.loaded or name.startswith("__"):
+            raise AttributeError("The ruleset has no " + name + " data")
+        self.load()
+        return getattr(self, name)
+
+
+rules = Ruleset()
+
+
+def __getattr__(name):
+    """ Old module level names for the data, e.g. rpgSystem.Races."""
+    if (name in Ruleset.RPG_SECTIONS or name in Ruleset.STATS_SECTIONS or
+            name in ("rpgData", "namesData", "statsData")):
+        return getattr(rules, name)
+    raise AttributeError("module 'rpgSystem' has no attribute " + repr(name))
 
 
 # ---------------------------------------------------------------------------
+def _frozen(value):
+    """ Read-only version of a list or dictionary stored on a Character."""
+    if isinstance(value, list):
+        return tuple(value)
+    if isinstance(value, dict):
+        return MappingProxyType(value.copy())
+    return value
+
+
+def _thawed(value):
+    """ Copy of a value stored on a Character as the type it was given as."""
+    if isinstance(value, tuple):
+        return list(value)
+    if isinstance(value, MappingProxyType):
+        return dict(value)
+    return value
+
+
+def _extended(value, X):
+    """ value with X added to the end, like += on the original list."""
+    if isinstance(value, tuple):
+        return value + tuple(X)
+    return value + X
+
+
+class CharacterTemplate(object):
+    """
+    The starting state shared by every character with the same race, role
+    and background, worked out once from RaceStats, RoleStats and
+    BackgroundStats. Treat everything on it as read-only.
+    """
+
+    def __init__(self, race, role, background):
+        raceStats = rules.RaceStats[race]
+        roleStats = rules.RoleStats[role]
+        bgStats = rules.BackgroundStats[background]
+
+        self.race = race
+        self.role = role
+        self.background = background
+        self.majorRace = raceStats["majorRace"]
+
+        self.size = raceStats["Size"]
+        self.speed = raceStats["Speed"]
+        self.hitDie = roleStats["Hit Die"]
+        progression = role_progression(role)
+        self.proficiencyBonus = progression.proficiencyBonus[1]
+
+        self.raceRules = tuple(raceStats["Special Rules"])
+        self.roleRules = progression.roleRules[1]
+        self.roleAbilities = progression.abilities[1]
+        self.backgroundFeature = bgStats["Feature"]
+
+        self.languages = (tuple(raceStats["Languages"]) +
+                          tuple(bgStats["Languages"]))
+        self.equipment = (tuple(roleStats["Equipment"]) +
+                          tuple(bgStats["Equipment"]))
+
+        proficiencies = {}
+        for i in rules.rpgData["Proficiency Types"]:
+            proficiencies[i] = []
+        for stats in (raceStats, roleStats, bgStats):
+            for i in stats["Proficiencies"]:
+                proficiencies[i] += stats["Proficiencies"][i]
+        self.proficiencies = {k: tuple(v) for k, v in proficiencies.items()}
+
+
+class RoleProgression(object):
+    """
+    A role's level table from RoleStats, compiled once when the rules load.
+
+    Each tuple is indexed by level: roleRules[n] is every special rule
+    gained up to level n, abilities[n] and proficiencyBonus[n] are the
+    role's abilities and proficiency bonus at level n. Characters reference
+    these rather than building their own, so treat them as read-only.
+    """
+
+    def __init__(self, role, roleStats):
+        levels = roleStats["Levels"]
+        self.role = role
+        self.maxLevel = max(int(i) for i in levels)
+
+        roleRules = [()]
+        abilities = [MappingProxyType({})]
+        proficiencyBonus = [None]
+        for lvl in range(1, self.maxLevel + 1):
+            stats = levels[str(lvl)]
+            roleRules.append(roleRules[-1] + tuple(stats["Special Rules"]))
+            abilities.append(MappingProxyType(stats["Other"]))
+            proficiencyBonus.append(stats["Proficiency Bonus"])
+        self.roleRules = tuple(roleRules)
+        self.abilities = tuple(abilities)
+        self.proficiencyBonus = tuple(proficiencyBonus)
+
+
+def role_progression(role):
+    """ The RoleProgression for a role."""
+    return rules.RoleProgressions[role]
+
+
+class _ScoresView(Mapping):
+    """
+    A read-only view of a Character's ability scores, modifiers or skills.
+
+    Every read goes to the character, so the view never goes stale and
+    nothing is copied to make it.
+    """
+
+    __slots__ = ("_player",)
+
+    def __init__(self, player):
+        self._player = player
+
+    def __repr__(self):
+        return type(self).__name__ + "(" + repr(dict(self)) + ")"
+
+
+class _AttribView(_ScoresView):
+    __slots__ = ()
+
+    def __getitem__(self, attribute):
+        player = self._player
+        try:
+            return player._scores[rules.AttributeIndex[attribute]]
+        except KeyError:
+            if player._extraAttribs and attribute in player._extraAttribs:
+                return player._extraAttribs[attribute]
+            raise
+
+    def __iter__(self):
+        yield from rules.Attributes
+        if self._player._extraAttribs:
+            yield from self._player._extraAttribs
+
+    def __len__(self):
+        return len(rules.Attributes) + len(self._player._extraAttribs or ())
+
+
+class _ModView(_ScoresView):
+    __slots__ = ()
+
+    def __getitem__(self, mod):
+        player = self._player
+        if player._modOverride is not None:
+            return player._modOverride[mod]
+        attribute = mod[:-len("_mod")]
+        if not mod.endswith("_mod") or not (
+                attribute in rules.AttributeIndex or
+                player._extraAttribs and attribute in player._extraAttribs):
+            raise KeyError(mod)
+        return player.getMod(attribute)
+
+    def __iter__(self):
+        player = self._player
+        if player._modOverride is not None:
+            return iter(player._modOverride)
+        return (a + "_mod" for a in _AttribView(player))
+
+    def __len__(self):
+        player = self._player
+        if player._modOverride is not None:
+            return len(player._modOverride)
+        return len(_AttribView(player))
+
+
+class _SkillView(_ScoresView):
+    __slots__ = ()
+
+    # skillDict is kept up to date rather than rebuilt, so is cheap to read
+
+    def __getitem__(self, skill):
+        return self._player.skillDict[skill]
+
+    def __iter__(self):
+        return iter(self._player.skillDict)
+
+    def __len__(self):
+        return len(self._player.skillDict)
+
+
+def get_template(race, role, background):
+    """ The CharacterTemplate for a race, role and background."""
+    key = (race, role, background)
+    try:
+        return rules.templates[key]
+    except KeyError:
+        template = rules.templates[key] = CharacterTemplate(*key)
+        return template
+
+
 class Character(object):
     """
     A character usable in Dungeons and Dragons 5th edition.
 
     Has a race and class, as well ability scores and stats.
+
+    Ability scores are kept in a small array in the order of
+    rules.Attributes. Modifiers, skills and AC are derived from them, and
+    changing a score only marks what depends on it as dirty; those values
+    are recomputed the next time they are read.
     """
 
+    __slots__ = ("name", "race", "majorRace", "role", "background",
+                 "size", "speed", "hitDie", "proficiencyBonus",
+                 "specialRules", "equipment", "languages", "proficiencies",
+                 "lvl", "xp", "AC", "hitpoints", "scorelist",
+                 "_scores", "_extraAttribs", "_modOverride", "_skillOverride",
+                 "_mods", "_dirty", "_skills", "_acStale")
+
     def __init__(self, name, race, role, background):
 
         self.name = name
         self.race = race
-        self.majorRace = RaceStats[race]["majorRace"]
         self.role = role
         self.background = background
 
-        self.specialRules = {"Other": []}
-        self.equipment = []
-        self.languages = []
-        self.proficiencies = {}
-
-        for i in rpgData["Proficiency Types"]:
-            self.proficiencies[i] = []
-
-        # Race
-        self.size = RaceStats[race]["Size"]
-        self.speed = RaceStats[race]["Speed"]
-        for i in RaceStats[race]["Languages"]:
-            self.languages.append(i)
-        self.specialRules["Race Rules"] = RaceStats[race]["Special Rules"]
-
-        for i in RaceStats[race]["Proficiencies"]:
-            self.proficiencies[i] += RaceStats[race]["Proficiencies"][i]
-
-        # Role
-        for i in RoleStats[role]["Proficiencies"]:
-            self.proficiencies[i] += RoleStats[role]["Proficiencies"][i]
-
-        self.specialRules["Role Rules"] = RoleStats[role]["Levels"]["1"]["Special Rules"]
-        self.specialRules["Role Abilities"] = RoleStats[role]["Levels"]["1"]["Other"]
-        for i in RoleStats[role]["Equipment"]:
-            self.equipment.append(i)
-        self.hitDie = RoleStats[role]["Hit Die"]
-
-        # Background
-        for i in BackgroundStats[background]["Proficiencies"]:
-            self.proficiencies[i] += BackgroundStats[background][
-                                                        "Proficiencies"][i]
-        for i in BackgroundStats[background]["Languages"]:
-            self.languages.append(i)
-
-        for i in BackgroundStats[background]["Equipment"]:
-            self.equipment.append(i)
-        self.specialRules["Background Feature"] = BackgroundStats[background][
-                                                                    "Feature"]
-
-        self.attribDict = {}
-
-        for i in Attributes:
-            self.attribDict[i] = 0
-
-        self.modDict = {}
-        self.skillDict = {}
-        self.set_mods()
+        # Everything shared by all characters of this race, role and
+        # background comes from a template, only worked out once
+        template = get_template(race, role, background)
+        self.majorRace = template.majorRace
+        self.size = template.size
+        self.speed = template.speed
+        self.hitDie = template.hitDie
+        self.proficiencyBonus = template.proficiencyBonus
+
+        # Lists are stored as tuples, so they can be shared with the
+        # template and handed out by the getters without copying
+        self.specialRules = {"Other": (),
+                             "Race Rules": template.raceRules,
+                             "Role Rules": template.roleRules,
+                             "Role Abilities": template.roleAbilities,
+                             "Background Feature": template.backgroundFeature}
+        self.equipment = template.equipment
+        self.languages = template.languages
+        self.proficiencies = dict(template.proficiencies)
+
+        self._reset_scores()
+        # Set by setModDict/setSkillDict until the next set_mods
+        self._modOverride = None
+        self._skillOverride = None
 
         self.lvl = 1
         self.xp = 0
-        self.proficiencyBonus = RoleStats[role]["Levels"][str(self.lvl)]["Proficiency Bonus"]
 
-        self.AC = 10 + self.modDict["Dexterity_mod"]
+        self.AC = self.evaluate("AC")
+        self._acStale = False
         self.hitpoints = 0
 
-        self.scorelist = []
+        self.scorelist = ()
+
+    # Every field a saved character has, as given by getCharDict
+    FIELDS = ("Name", "Race", "Role", "Background", "Attributes", "Hitpoints",
+              "SpecialRules", "Equipment", "Languages", "Proficiencies",
+              "Size", "Speed", "Level", "XP", "AC", "Proficiency Bonus")
+
+    @classmethod
+    def from_dict(cls, charDict):
+        """
+        Make a Character straight from a getCharDict dictionary, like a save.
+
+        Skips building the character up from its template, as the dictionary
+        already has everything, so is much quicker than making a Character
+        and calling every setter.
+        """
+        missing = [k for k in cls.FIELDS if k not in charDict]
+        if missing:
+            raise ValueError("Saved character is missing " + ", ".join(missing))
+        try:
+            raceStats = rules.RaceStats[charDict["Race"]]
+            roleStats = rules.RoleStats[charDict["Role"]]
+            rules.BackgroundStats[charDict["Background"]]
+        except KeyError as err:
+            raise ValueError(str(err) + " is not in the ruleset") from None
+
+        self = cls.__new__(cls)
+        self.name = charDict["Name"]
+        self.race = charDict["Race"]
+        self.role = charDict["Role"]
+        self.background = charDict["Background"]
+        self.majorRace = raceStats["majorRace"]
+        self.hitDie = roleStats["Hit Die"]
+
+        self.size = charDict["Size"]
+        self.speed = charDict["Speed"]
+        self.proficiencyBonus = charDict["Proficiency Bonus"]
+        self.lvl = charDict["Level"]
+        self.xp = charDict["XP"]
+        self.AC = charDict["AC"]
+        self.hitpoints = int(charDict["Hitpoints"])
+        self.scorelist = ()
+
+        self.specialRules = {k: _frozen(v)
+                             for k, v in charDict["SpecialRules"].items()}
+        # Share the role's rules with every other character at this level
+        # if they haven't been edited
+        progression = role_progression(self.role)
+        roleRules = self.specialRules.get("Role Rules")
+        if (type(self.lvl) is int and 1 <= self.lvl <= progression.maxLevel
+                and roleRules == progression.roleRules[self.lvl]):
+            self.specialRules["Role Rules"] = progression.roleRules[self.lvl]
+        self.equipment = tuple(charDict["Equipment"])
+        self.languages = tuple(charDict["Languages"])
+        self.proficiencies = {k: _frozen(v)
+                              for k, v in charDict["Proficiencies"].items()}
+
+        self._reset_scores()
+        self._modOverride = None
+        self._skillOverride = None
+        for attribute, score in charDict["Attributes"].items():
+            self.setAttrib(attribute, score)
+        return self
+
+    def __getstate__(self):
+        # Read-only views of the rule data can't be pickled, so copy them
+        state = {k: getattr(self, k) for k in self.__slots__}
+        state["specialRules"] = self.getSpecialRules()
+        return state
+
+    def __setstate__(self, state):
+        for k, v in state.items():
+            setattr(self, k, v)
+        self.setSpecialRules(self.specialRules)
 
     def calc_mod(self, stat):
         """
@@ -149,26 +625,189 @@ class Character(object):
         return modifier
 
     def set_mods(self):
-        """ Sets all the ability modifiers."""
-        for i in self.attribDict:
-            mod = i + "_mod"
-            self.modDict[mod] = self.calc_mod(self.attribDict[i])
+        """
+        Sets all the ability modifiers.
 
-        for i in Skills:
-            self.skillDict[i] = self.modDict[Skills[i]]
+        Modifiers always follow the ability scores now, so this just drops
+        any set with setModDict or setSkillDict.
+        """
+        self._modOverride = None
+        self._skillOverride = None
+
+    def _reset_scores(self):
+        """ Set every ability score to 0."""
+        numAttribs = len(rules.Attributes)
+        self._scores = array('h', bytes(2 * numAttribs))
+        # Scores for attributes that aren't in the ruleset, rarely used
+        self._extraAttribs = None
+        # Cached modifiers, and a bit for each one that needs recomputing
+        self._mods = array('h', [self.calc_mod(0)] * numAttribs)
+        self._dirty = 0
+        # Cached skills, built the first time they are read
+        self._skills = None
+        # Whether anything AC depends on has changed since it was worked out
+        self._acStale = True
+
+    def _refresh_mods(self):
+        """ Recompute the modifiers of any attributes that have changed."""
+        dirty = self._dirty
+        if not dirty:
+            return
+        self._dirty = 0
+        if dirty & rules.ACDepends[0]:
+            self._acStale = True
+        i = 0
+        while dirty:
+            if dirty & 1:
+                mod = (self._scores[i] - 10) // 2
+                if mod != self._mods[i]:
+                    self._mods[i] = mod
+                    # Only the skills of this attribute need updating
+                    if self._skills is not None:
+                        for skill in rules.SkillsByAttribute[i]:
+                            self._skills[skill] = mod
+            dirty >>= 1
+            i += 1
+
+    @property
+    def attribDict(self):
+        """ Dictionary of each attribute to its score."""
+        attribs = dict(zip(rules.Attributes, self._scores))
+        if self._extraAttribs:
+            attribs.update(self._extraAttribs)
+        return attribs
+
+    @property
+    def modDict(self):
+        """ Dictionary of each attribute's modifier, e.g. Strength_mod."""
+        if self._modOverride is not None:
+            return self._modOverride
+        self._refresh_mods()
+        mods = dict(zip(rules.ModNames, self._mods))
+        if self._extraAttribs:
+            for i, score in self._extraAttribs.items():
+                mods[i + "_mod"] = self.calc_mod(score)
+        return mods
+
+    @property
+    def skillDict(self):
+        """ Dictionary of each skill's value, its attribute's modifier."""
+        if self._skillOverride is not None:
+            return self._skillOverride
+        self._refresh_mods()
+        if self._skills is None:
+            mods = dict(zip(rules.ModNames, self._mods))
+            self._skills = {skill: mods[mod]
+                            for skill, mod in rules.Skills.items()}
+        return self._skills
+
+    def getMod(self, attribute):
+        """ The modifier for one attribute, e.g. getMod("Dexterity")."""
+        if self._modOverride is not None:
+            return self._modOverride[attribute + "_mod"]
+        try:
+            i = rules.AttributeIndex[attribute]
+        except KeyError:
+            return self.calc_mod(self.getAttrib(attribute))
+        if self._dirty >> i & 1:
+            self._refresh_mods()
+        return self._mods[i]
 
-    def level_up(self):
+    def level_up(self, rng=None):
         """ Levels up the character!"""
-        self.lvl += 1
+        self.level_to(self.lvl + 1, rng)
+
+    def level_to(self, level, rng=None):
+        """
+        Levels the character up to level in one go.
+
+        Gives the same character as calling level_up until it gets there,
+        but rolls all the hit dice at once and takes the role's rules for
+        every level gained straight from its RoleProgression.
+        """
+        steps = level - self.lvl
+        if steps < 0:
+            raise ValueError("Can't level a character down from " +
+                             str(self.lvl) + " to " + str(level))
+        if steps == 0:
+            return
+        progression = role_progression(self.role)
+        if level > progression.maxLevel:
+            raise ValueError(str(self.role) + " has no level " + str(level) +
+                             " in RoleStats")
+
+        # Modifiers set by hand are dropped, so AC may change with them
+        if self._modOverride is not None:
+            self._acStale = True
         self.set_mods()
-        self.hitpoints += (dice(int(self.hitDie[1:])) +
-                           int(self.modDict["Constitution_mod"]))
-        self.AC = 10 + self.modDict["Dexterity_mod"]
-        self.specialRules["Role Rules"] += RoleStats[self.role]["Levels"][str(self.lvl)]["Special Rules"]
-        self.specialRules["Role Abilities"] = RoleStats[self.role]["Levels"][str(self.lvl)]["Other"]
-        self.proficiencyBonus = RoleStats[self.role]["Levels"][str(self.lvl)]["Proficiency Bonus"]
+        rolls = rd.compile_roll(self.hitDie).roll_batch(steps, backend="python",
+                                                        rng=rng)
+        # Each die goes through the Level Hitpoints formula with the level
+        # and proficiency bonus of the level it is rolled for
+        formula = rules.Formulas["Level Hitpoints"]
+        values = self._formula_values(formula, {"HitDie": 0, "Level": 0,
+                                                "ProficiencyBonus": 0})
+        for gained, roll in zip(range(self.lvl + 1, level + 1), rolls):
+            values["HitDie"] = roll
+            values["Level"] = gained
+            values["ProficiencyBonus"] = progression.proficiencyBonus[gained]
+            self.hitpoints += int(formula(values))
+
+        # Characters with the role's usual rules share the progression's
+        # tuple for the new level, only ones with edited rules get their own
+        roleRules = self.specialRules["Role Rules"]
+        if roleRules == progression.roleRules[self.lvl]:
+            self.specialRules["Role Rules"] = progression.roleRules[level]
+        else:
+            self.specialRules["Role Rules"] = roleRules + progression.roleRules[
+                level][len(progression.roleRules[self.lvl]):]
+        self.specialRules["Role Abilities"] = progression.abilities[level]
+        self.proficiencyBonus = progression.proficiencyBonus[level]
+        self.lvl = level
+
+        # AC only needs working out again if something it uses has changed
+        self._refresh_mods()
+        if self._acStale or rules.ACDepends[1]:
+            self.AC = self.evaluate("AC")
+            self._acStale = False
 
     # Get attributes
+    # Getters with a view argument return a copy by default, or with
+    # view=True a read-only view of the character's own data, which is
+    # quicker as nothing has to be copied
+    def _formula_value(self, name):
+        """ The value of a name used in a formula, for this character."""
+        if name in rules.AttributeIndex:
+            return self.getAttrib(name)
+        if name.endswith("_mod"):
+            return self.getMod(name[:-len("_mod")])
+        if name == "Level":
+            return self.lvl
+        if name == "ProficiencyBonus":
+            return self.proficiencyBonus
+        # Anything else is a number from the character's role or race stats
+        for stats in (rules.RoleStats.get(self.role, {}),
+                      rules.RaceStats.get(self.race, {})):
+            if name in stats:
+                return stats[name]
+        raise KeyError("No value for " + name + " for a " + str(self.race) +
+                       " " + str(self.role))
+
+    def _formula_values(self, formula, values):
+        """ values, with anything else formula needs from this character."""
+        for name in formula.names:
+            if name not in values:
+                values[name] = self._formula_value(name)
+        return values
+
+    def evaluate(self, formula, **values):
+        """
+        Work out one of rules.Formulas for this character, e.g.
+        evaluate("AC"). Values for any names can be given instead.
+        """
+        formula = rules.Formulas[formula]
+        return formula(self._formula_values(formula, values))
+
     def getName(self):
         return self.name
 
@@ -183,31 +822,48 @@ class Character(object):
 
     def getAttrib(self, attribute):
         try:
-            return self.attribDict[attribute]
+            return self._scores[rules.AttributeIndex[attribute]]
         except KeyError as err:
+            if self._extraAttribs and attribute in self._extraAttribs:
+                return self._extraAttribs[attribute]
             print("Error: This character has no", str(err), "attribute")
             return False
 
-    def getAttribDict(self):
-        return self.attribDict.copy()
+    def getAttribDict(self, view=False):
+        # attribDict is built fresh each time, so is already a copy
+        if view:
+            return _AttribView(self)
+        return self.attribDict
 
-    def getModDict(self):
+    def getModDict(self, view=False):
+        if view:
+            return _ModView(self)
         return self.modDict.copy()
 
-    def getSkillDict(self):
+    def getSkillDict(self, view=False):
+        if view:
+            return _SkillView(self)
         return self.skillDict.copy()
 
-    def getSpecialRules(self):
-        return self.specialRules.copy()
+    def getSpecialRules(self, view=False):
+        if view:
+            return MappingProxyType(self.specialRules)
+        return {k: _thawed(v) for k, v in self.specialRules.items()}
 
-    def getEquipment(self):
-        return self.equipment.copy()
+    def getEquipment(self, view=False):
+        if view:
+            return self.equipment
+        return list(self.equipment)
 
-    def getLanguages(self):
-        return self.languages.copy()
+    def getLanguages(self, view=False):
+        if view:
+            return self.languages
+        return list(self.languages)
 
-    def getProficiencies(self):
-        return self.proficiencies.copy()
+    def getProficiencies(self, view=False):
+        if view:
+            return MappingProxyType(self.proficiencies)
+        return {k: _thawed(v) for k, v in self.proficiencies.items()}
 
     def getSize(self):
         return self.size
@@ -233,8 +889,23 @@ class Character(object):
     def getAC(self):
         return self.AC
 
-    def getScorelist(self):
-        return self.scorelist.copy()
+    def getScorelist(self, view=False):
+        if view:
+            return self.scorelist
+        return list(self.scorelist)
+
+    def getRollValues(self):
+        """
+        Values for names in dice expressions, e.g. "1d8+CON".
+
+        Each modifier is available by its full name (Constitution_mod)
+        and its abbreviation (CON), along with the proficiency bonus (PROF).
+        """
+        values = self.getModDict()
+        for mod, val in self.modDict.items():
+            values[mod[:3].upper()] = val
+        values["PROF"] = self.proficiencyBonus
+        return values
 
     # Set attributes
     def setName(self, X):
@@ -250,16 +921,46 @@ class Character(object):
         self.background = X
 
     def setAttrib(self, attribute, X):
-        self.attribDict[attribute] = X
+        try:
+            i = rules.AttributeIndex[attribute]
+        except KeyError:
+            if self._extraAttribs is None:
+                self._extraAttribs = {}
+            self._extraAttribs[attribute] = X
+        else:
+            try:
+                self._scores[i] = X
+            except (TypeError, OverflowError):
+                self._scores[i] = self._whole_score(attribute, X)
+            self._dirty |= 1 << i
+
+    # Scores are kept in a signed 16 bit array
+    SCORE_RANGE = (-2 ** 15, 2 ** 15 - 1)
+
+    @classmethod
+    def _whole_score(cls, attribute, X):
+        """
+        X as a score that fits in the scores array, for scores that don't
+        already, like 15.0. Anything else is a ValueError.
+        """
+        if isinstance(X, float) and X.is_integer():
+            X = int(X)
+        low, high = cls.SCORE_RANGE
+        if isinstance(X, int) and low <= X <= high:
+            return X
+        raise ValueError(str(attribute) + " must be a whole number from " +
+                         str(low) + " to " + str(high) + ", not " + repr(X))
 
     def setAttribDict(self, X):
-        self.attribDict = X
+        self._reset_scores()
+        for attribute, score in X.items():
+            self.setAttrib(attribute, score)
 
     def setModDict(self, X):
-        self.modDict = X
+        self._modOverride = X
 
     def setSkillDict(self, X):
-        self.skillDict = X
+        self._skillOverride = X
 
     def setSize(self, X):
         self.size = X
@@ -270,6 +971,20 @@ class Character(object):
     def setLevel(self, X):
         self.lvl = X
 
+    def setLevelRules(self, X):
+        """
+        Set the level, and the role rules, abilities and proficiency bonus
+        a new character would have after levelling up to it.
+        """
+        progression = role_progression(self.role)
+        if not 1 <= X <= progression.maxLevel:
+            raise ValueError(str(self.role) + " has no level " + str(X) +
+                             " in RoleStats")
+        self.specialRules["Role Rules"] = progression.roleRules[X]
+        self.specialRules["Role Abilities"] = progression.abilities[X]
+        self.proficiencyBonus = progression.proficiencyBonus[X]
+        self.lvl = X
+
     def setXP(self, X):
         self.xp = X
 
@@ -277,36 +992,38 @@ class Character(object):
         self.proficiencyBonus = X
 
     def setSpecialRules(self, X):
-        self.specialRules = X
+        self.specialRules = {k: _frozen(v) for k, v in X.items()}
 
     def setEquipment(self, X):
-        self.equipment = X
+        self.equipment = tuple(X)
 
     def setLanguages(self, X):
-        self.languages = X
+        self.languages = tuple(X)
 
     def setProficiencies(self, X):
-        self.proficiencies = X
+        self.proficiencies = {k: _frozen(v) for k, v in X.items()}
 
     def addSpecialRule(self, X, subset="Other"):
         try:
-            self.specialRules[subset] += X
+            self.specialRules[subset] = _extended(self.specialRules[subset],
+                                                  X)
         except KeyError:
             print("New ruleset")
-            self.specialRules[subset] = [X]
+            self.specialRules[subset] = (X,)
 
     def addEquipment(self, X):
-        self.equipment += X
+        self.equipment += tuple(X)
 
     def addLanguages(self, X):
-        self.languages += X
+        self.languages += tuple(X)
 
     def addProficiencies(self, subset, X):
         try:
-            self.proficiencies[subset] += X
+            self.proficiencies[subset] = _extended(self.proficiencies[subset],
+                                                   X)
         except KeyError:
             print("New proficiency set")
-            self.proficiencies[subset] = [X]
+            self.proficiencies[subset] = (X,)
 
     def setHitpoints(self, X):
         self.hitpoints = int(X)
@@ -316,21 +1033,26 @@ class Character(object):
 
     def setScorelist(self, X):
         """ X is a list of integers."""
-        self.scorelist = X
+        self.scorelist = tuple(X)
 
-    def getCharDict(self):
-        """Get a dictionary representing the character."""
+    def getCharDict(self, view=False):
+        """
+        Get a dictionary representing the character.
+
+        With view=True the values are read-only views rather than copies,
+        which is quicker for just reading but can't be saved as json.
+        """
         charDict = {
                     "Name": self.getName(),
                     "Race": self.getRace(),
                     "Role": self.getRole(),
                     "Background": self.getBackground(),
-                    "Attributes": self.getAttribDict(),
+                    "Attributes": self.getAttribDict(view),
                     "Hitpoints": self.getHitpoints(),
-                    "SpecialRules": self.getSpecialRules(),
-                    "Equipment": self.getEquipment(),
-                    "Languages": self.getLanguages(),
-                    "Proficiencies": self.getProficiencies(),
+                    "SpecialRules": self.getSpecialRules(view),
+                    "Equipment": self.getEquipment(view),
+                    "Languages": self.getLanguages(view),
+                    "Proficiencies": self.getProficiencies(view),
                     "Size": self.getSize(),
                     "Speed": self.getSpeed(),
                     "Level": self.getLevel(),
@@ -352,39 +1074,97 @@ class Character(object):
 
 
 # ---------------------------------------------------------------------------
-def saveChar(player, filename="default"):
+def char_json(charDict):
+    """ The json a character's getCharDict dictionary is saved as."""
+    return json.dumps(charDict, sort_keys=True, indent=4)
+
+
+# The process's umask, read the first time a new file is saved
+_umask = None
+
+
+def _file_mode(filename):
+    """
+    The permissions a save to filename should have: those of the file
+    already there, or what open would give a new file.
+    """
+    global _umask
+    try:
+        return os.stat(filename).st_mode & 0o7777
+    except FileNotFoundError:
+        pass
+    if _umask is None:
+        # The only way to read the umask is to set it
+        _umask = os.umask(0o022)
+        os.umask(_umask)
+    return 0o666 & ~_umask
+
+
+def write_temp(filename, data):
+    """
+    Write data (a str or bytes) to a new temporary file next to filename,
+    ready to be renamed over it, with the permissions filename has or a new
+    file would get. Returns the temporary file's path.
+    """
+    if isinstance(data, str):
+        data = data.encode()
+    fd, temp = tempfile.mkstemp(prefix=".", suffix=".tmp",
+                                dir=os.path.dirname(os.path.abspath(filename)))
+    try:
+        # mkstemp makes files only the owner can read
+        os.fchmod(fd, _file_mode(filename))
+        with os.fdopen(fd, 'wb') as f:
+            f.write(data)
+    except BaseException:
+        os.remove(temp)
+        raise
+    return temp
+
+
+def write_file(filename, data, sync=True, overwrite=True):
+    """
+    Write data to filename atomically: to a temporary file that is then
+    renamed over it, so the file is never left half written.
+
+    With sync the data is on disk, not just in the OS's cache, before the
+    rename. Without overwrite the temporary file is linked to filename
+    instead, which raises FileExistsError if filename exists, even if it
+    was made while the data was being written.
+    """
+    temp = write_temp(filename, data)
+    try:
+        if sync:
+            with open(temp, 'rb') as f:
+                os.fsync(f.fileno())
+        if overwrite:
+            os.replace(temp, filename)
+            return
+        try:
+            os.link(temp, filename)
+        except FileExistsError:
+            raise FileExistsError("The file " + str(filename) +
+                                  " already exists") from None
+        os.remove(temp)
+    except BaseException:
+        if os.path.exists(temp):
+            os.remove(temp)
+        raise
+
+
+def saveChar(player, filename="default", overwrite=False, sync=True):
         """
-        Save a Character into a json object.
+        Save a Character into a json object, atomically and without asking
+        anything, so it is safe to use from scripts and the GUI.
 
         filename will default to the character's name if no argument is given.
+        Raises FileExistsError if the file exists, unless overwrite is True.
+        Returns the filename saved to.
         """
         if filename == "default":
             filename = player.name
 
-        # Dictionary to create json object
-        charDict = player.getCharDict()
-
-        try:
-            with open(filename, 'x') as f:
-                json.dump(charDict, f, sort_keys=True, indent=4)
-                print("Save successful")
-        except FileExistsError:
-            while True:
-                print("The file", str(filename),
-                      "already exists, do you want to overwrite it?")
-                print("Yes to overwrite or No to abort")
-                overwrite = input(">")
-                overwrite = overwrite.upper()
-                if overwrite == "Y" or overwrite == "YES":
-                    with open(filename, 'w') as f:
-                        json.dump(charDict, f, sort_keys=True, indent=4)
-                        print("Save successful")
-                        break
-                elif overwrite == "N" or overwrite == "NO":
-                    print("Saving process aborted")
-                    break
-                else:
-                    print("Invalid command")
+        write_file(filename, char_json(player.getCharDict()), sync, overwrite)
+        return filename
 
 
 def load_char(filename):
@@ -396,22 +1176,7 @@ def load_char(filename):
         print("That file could not be found :(")
         return
 
-    savedChar = Character(charDict["Name"], charDict["Race"], charDict["Role"],
-                          charDict["Background"])
-
-    savedChar.setAttribDict(charDict["Attributes"]),
-    savedChar.set_mods()
-    savedChar.setHitpoints(charDict["Hitpoints"]),
-    savedChar.setSpecialRules(charDict["SpecialRules"]),
-    savedChar.setEquipment(charDict["Equipment"]),
-    savedChar.setLanguages(charDict["Languages"]),
-    savedChar.setProficiencies(charDict["Proficiencies"]),
-    savedChar.setSize(charDict["Size"]),
-    savedChar.setSpeed(charDict["Speed"]),
-    savedChar.setLevel(charDict["Level"]),
-    savedChar.setXP(charDict["XP"]),
-    savedChar.setAC(charDict["AC"])
-    savedChar.setProficiencyBonus(charDict["Proficiency Bonus"])
+    savedChar = Character.from_dict(charDict)
 
     print("Character", str(savedChar.getName()), "sucessfully loaded")
     return savedChar
@@ -429,7 +1194,15 @@ def query_save(player):
                   "or 'default' to use the character's name")
             filename = input(">")
             print("Saving...")
-            saveChar(player, filename)
+            try:
+                saveChar(player, filename)
+            except FileExistsError:
+                if query_overwrite(filename):
+                    saveChar(player, filename, overwrite=True)
+                else:
+                    print("Saving process aborted")
+                    break
+            print("Save successful")
             break
         elif conf == "N" or conf == "NO":
             print("Character not saved")
@@ -438,27 +1211,62 @@ def query_save(player):
             print("Invalid command")
 
 
-def stat_roll():
+def query_overwrite(filename):
+    """ Ask whether to overwrite a file that already exists."""
+    while True:
+        print("The file", str(filename),
+              "already exists, do you want to overwrite it?")
+        print("Yes to overwrite or No to abort")
+        overwrite = input(">")
+        overwrite = overwrite.upper()
+        if overwrite == "Y" or overwrite == "YES":
+            return True
+        elif overwrite == "N" or overwrite == "NO":
+            return False
+        else:
+            print("Invalid command")
+
+
+def stat_roll(rng=None):
     """
     Rolls ability scores.
 
     Output: a list of scores in descending order,
     which can then be assigned to abilities.
     """
-    scorelist = []
-    for i in range(len(Attributes)):
-        statlist = []
-        for j in range(4):
-            statlist.append(dice(6))
-        statlist.remove(min(statlist))
+    return stat_roll_batch(1, backend="python", rng=rng)[0]
+
 
-        ability_score = 0
-        for num in statlist:
-            ability_score += num
-        scorelist.append(ability_score)
+def stat_roll_batch(n, backend=None, rng=None):
+    """
+    Rolls the ability scores for n characters at once.
 
-    scorelist.sort(reverse=True)
-    return scorelist
+    Output: n scorelists, each in descending order like stat_roll.
+    With numpy this is an n x len(Attributes) int8 array, otherwise a list.
+    """
+    if backend is None:
+        backend = rd.BACKEND
+    numScores = len(rules.Attributes)
+
+    # Roll 4d6 for each score and drop the lowest die
+    if backend == "numpy":
+        np = rd.numpy()
+        rolls = rd.roll_batch(6, 4, n * numScores, per_die=True,
+                              backend=backend, dtype=np.int8, rng=rng)
+        scores = rolls.sum(axis=1, dtype=np.int8) - rolls.min(axis=1)
+        scores = scores.reshape(n, numScores)
+        scores.sort(axis=1)
+        return scores[:, ::-1]
+
+    rolls = rd.roll_batch(6, 4, n * numScores, per_die=True, backend=backend,
+                          rng=rng)
+    scores = [sum(statlist) - min(statlist) for statlist in rolls]
+    scorelists = []
+    for i in range(0, n * numScores, numScores):
+        scorelist = scores[i:i + numScores]
+        scorelist.sort(reverse=True)
+        scorelists.append(scorelist)
+    return scorelists
 
 
 # ---------------------------------------------------------------------------
@@ -467,13 +1275,13 @@ def race_gen():
     while True:
         print()
         print("What race do you want to play as?")
-        print("You can choose from the following:", str(Races))
+        print("You can choose from the following:", str(rules.Races))
         print('Type "random" for a random race')
         race = input(">")
         race = race.title()        # .title works for Half-Elf etc.
 
         if race.lower() == "random":
-            race = random.choice(Races)
+            race = random.choice(rules.Races)
             while True:
                 print("Is a", str(race), "fine?")
                 print("Type Yes to confirm, No to re-random",
@@ -487,7 +1295,7 @@ def race_gen():
                     race = "X"
                     break
                 elif confirm == "N" or confirm == "NO":
-                    race = random.choice(Races)
+                    race = random.choice(rules.Races)
                 else:
                     print("Invalid command")
 
@@ -495,7 +1303,7 @@ def race_gen():
         if race == "X":
             pass
 
-        elif race not in Races:
+        elif race not in rules.Races:
             print("Invalid selection\n")
 
         else:
@@ -516,13 +1324,13 @@ def role_gen():
     while True:
         print()
         print("What class do you want to play as?")
-        print("You can choose from the following:", str(Roles))
+        print("You can choose from the following:", str(rules.Roles))
         print('Type "random" for a random class')
         role = input(">")
         role = role.capitalize()
 
         if role.lower() == "random":
-            role = random.choice(Roles)
+            role = random.choice(rules.Roles)
             while True:
                 print("Is a", str(role), "fine?")
                 print("Type Yes to confirm, No to re-random",
@@ -536,7 +1344,7 @@ def role_gen():
                     role = "X"
                     break
                 elif confirm == "N" or confirm == "NO":
-                    role = random.choice(Roles)
+                    role = random.choice(rules.Roles)
                 else:
                     print("Invalid command")
 
@@ -544,7 +1352,7 @@ def role_gen():
         if role == "X":
             pass
 
-        elif role not in Roles:
+        elif role not in rules.Roles:
             print("Invalid selection\n")
 
         else:
@@ -556,7 +1364,16 @@ def role_gen():
                 return role
 
 
-def name_gen(race):
+def random_name(race, rng=None):
+    """ A random name for a character of the given race."""
+    try:
+        names = rules.NamePools[race]
+    except KeyError:
+        names = rules.namesData["Common_names"]
+    return rd.get_random(rng).choice(names)
+
+
+def name_gen(race, rng=None):
     """ Name generation."""
     while True:
         print()
@@ -566,19 +1383,7 @@ def name_gen(race):
         name = input(">")
 
         if name.lower() == "random":
-            # Half-Elves don't have their own specific names
-            # Need to make this non-hardcoded; put in the data files somehow
-            # Easiest would be copy paste elf+human names into Half-Elf_names
-            if race == "Half-Elf":
-                name = random.choice(namesData["Human_names"] +
-                                     namesData["Elf_names"])
-
-            else:
-                race_names = race + "_names"
-                try:
-                    name = random.choice(namesData[race_names])
-                except KeyError:
-                    name = random.choice(namesData["Common_names"])
+            name = random_name(race, rng)
 
         print("You are named:", str(name) + "!")
         return name
@@ -589,9 +1394,9 @@ def points_mode():
     pDict = {}
     # json changes dict keys to strings even if they were originally integers
     try:
-        for i in statsData["PointsCost"]:
-            pDict[int(i)] = statsData["PointsCost"][i]
-        points = statsData["PointsTotal"]
+        for i in rules.statsData["PointsCost"]:
+            pDict[int(i)] = rules.statsData["PointsCost"][i]
+        points = rules.statsData["PointsTotal"]
     except KeyError as err:
         print("DATA/statsData does not have a", str(err), "section")
         return False
@@ -599,7 +1404,7 @@ def points_mode():
     print("You have", str(points), "points to spend")
     print("The ability score to point cost is as follows:\n" + str(pDict))
     sList = []
-    for i in range(len(Attributes)):
+    for i in range(len(rules.Attributes)):
         sList.append(min(pDict))
     print("Your current scorelist is:", str(sList))
 
@@ -671,7 +1476,7 @@ def points_mode():
 def stat_gen():
     """ Generate ability scores using whatever mode is chosen."""
     try:
-        StandardPoints = statsData["StandardPoints"]
+        StandardPoints = rules.statsData["StandardPoints"]
     except KeyError:
         StandardPoints = False
     while True:
@@ -730,30 +1535,24 @@ def modifier_assign(player):
     """
     Assigns modifiers from attributes
 
-    (just hitpoints for now actually)
+    (just hitpoints for now actually, from the Hitpoints formula)
     """
-    const = player.getAttrib("Constitution")
-    if const is False:        # Saying not const would be True if const was 0
-        print("HP cannot be calculated without a Constitution attribute")
-        return False
+    player.set_mods()
     try:
-        hp = (RoleStats[player.role]["HitpointsBase"] +
-              player.calc_mod(const))
+        hp = player.evaluate("Hitpoints")
     except KeyError as err:
-        print("Error:", str(err), "not found in RoleStats section of",
-              "DATA/statsData.json file")
+        print("Error:", err.args[0], "so HP cannot be calculated")
         return False
 
     player.setHitpoints(hp)
-    player.set_mods()
 
 
 def auto_assign(player):
     """ Assigns the character's ability scores based on its class."""
-    for i in Attributes:
+    for i in rules.Attributes:
         prio = i + "Priority"
         try:
-            player.setAttrib(i, player.scorelist[RoleStats[player.role][prio]])
+            player.setAttrib(i, player.scorelist[rules.RoleStats[player.role][prio]])
         except KeyError as err:
             print("Error:", str(err), "not found in RoleStats section of",
                   "DATA/statsData.json file")
@@ -764,10 +1563,10 @@ def auto_assign(player):
                   "valid scorelist index. Refer to readme for how this works")
 
 
-def add_bonuses(player):
+def add_bonuses(player, rng=None):
     """ Bases the character's bonuses on its race. """
 
-    for i in Attributes:
+    for i in rules.Attributes:
         bonus = i + "Bonus"
         current = player.getAttrib(i)
         if current is False:
@@ -776,7 +1575,7 @@ def add_bonuses(player):
 
         else:
             try:
-                val = (current + RaceStats[player.race][bonus])
+                val = (current + rules.RaceStats[player.race][bonus])
             except KeyError as err:
                 print("Error:", str(err), "not found in RaceStats section of",
                       "DATA/statsData.json file")
@@ -784,17 +1583,14 @@ def add_bonuses(player):
 
             player.setAttrib(i, val)
 
-    # Half-Elves get +1 to 2 scores, randomly chosen for now
-    # Need to make this non-hardcoded; put in the data files somehow
-    if player.race == "Half-Elf":
-
-        a = random.choice(Attributes)
-        val = player.getAttrib(a) + 1
-        player.setAttrib(a, val)
-
-        b = random.choice(Attributes)
-        val = player.getAttrib(b) + 1
-        player.setAttrib(b, val)
+    # Some races, like Half-Elves, also get bonuses to randomly chosen scores
+    randomBonuses = rules.RaceStats[player.race].get("Random Bonuses", ())
+    if randomBonuses:
+        rand = rd.get_random(rng)
+        for bonus in randomBonuses:
+            a = rand.choice(rules.Attributes)
+            val = player.getAttrib(a) + bonus
+            player.setAttrib(a, val)
 
 
 def score_assignment(player):
@@ -815,7 +1611,7 @@ def score_assignment(player):
         elif assign_mode == "Y" or assign_mode == "YES":
             sList = player.getScorelist()
             sListCopy = sList.copy()
-            abilityCopy = Attributes.copy()
+            abilityCopy = rules.Attributes.copy()
 
             while True:
                 print("Your scores to assign are:", str(sListCopy))
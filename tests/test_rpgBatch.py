@@ -0,0 +1,118 @@
+# -*- coding: utf-8 -*-
+"""
+Tests for rpgBatch, checked against the per-Character functions.
+
+@author: auto-nom
+"""
+
+import os
+import sys
+import unittest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import rpgBuilder as rb
+import rpgDice as rd
+import rpgSystem as rs
+
+try:
+    import rpgBatch as rbt
+    rd.numpy()
+except ImportError:
+    rbt = None
+
+
+@unittest.skipIf(rbt is None, "CharacterBatch needs NumPy")
+class CharacterBatchTest(unittest.TestCase):
+
+    def test_round_trip(self):
+        """ from_characters then to_characters gives the same characters."""
+        players = [rb.random_gen(rd.DiceRNG(i)) for i in range(20)]
+        batch = rbt.CharacterBatch.from_characters(players)
+        self.assertEqual([p.getCharDict() for p in batch.to_characters()],
+                         [p.getCharDict() for p in players])
+
+    def test_matches_characters(self):
+        """
+        auto_assign, add_bonuses and modifier_assign give the same as the
+        rpgSystem functions, for races with no randomly chosen bonuses.
+        """
+        rules = rs.rules
+        players = []
+        for i, race in enumerate(rules.Races):
+            if rules.RaceStats[race].get("Random Bonuses"):
+                continue
+            for j, role in enumerate(rules.Roles):
+                player = rs.Character("Test", race, role, rules.Backgrounds[
+                    (i + j) % len(rules.Backgrounds)])
+                player.setScorelist(rs.stat_roll(rd.DiceRNG(i, (j,))))
+                players.append(player)
+
+        batch = rbt.CharacterBatch.from_characters(players)
+        batch.auto_assign()
+        batch.add_bonuses()
+        batch.modifier_assign()
+        for player in players:
+            rs.auto_assign(player)
+            rs.add_bonuses(player)
+            rs.modifier_assign(player)
+        self.assertEqual([p.getCharDict() for p in batch.to_characters()],
+                         [p.getCharDict() for p in players])
+
+
+@unittest.skipIf(rbt is None, "CharacterBatch needs NumPy")
+class LevelToTest(unittest.TestCase):
+
+    def setUp(self):
+        self.players = [rb.random_gen(rd.DiceRNG(i)) for i in range(12)]
+        self.levels = [1 + i % 5 * 4 for i in range(len(self.players))]
+
+    def tearDown(self):
+        # Put back the formulas from the data files
+        rs.rules.load()
+
+    def level_both(self):
+        """ Level the batch and the Characters to self.levels."""
+        batch = rbt.CharacterBatch.from_characters(self.players)
+        batch.level_to(self.levels, rd.DiceRNG(1))
+        for player, level in zip(self.players, self.levels):
+            player.level_to(level, rd.DiceRNG(1))
+        return batch.to_characters()
+
+    def test_matches_characters(self):
+        """ Each row is levelled like Character.level_to."""
+        # The batch rolls dice with NumPy, so use a formula without them
+        rules = rs.rules
+        rules.Formulas["Level Hitpoints"] = rs.Formula(
+            "Level Hitpoints", "Constitution_mod + Level + ProficiencyBonus")
+        leveled = self.level_both()
+        self.assertEqual([p.getCharDict() for p in leveled],
+                         [p.getCharDict() for p in self.players])
+
+    def test_hit_dice(self):
+        """ With the usual formula, hitpoints are in the range dice give."""
+        before = [p.getHitpoints() for p in self.players]
+        leveled = self.level_both()
+        for player, hp, level in zip(leveled, before, self.levels):
+            steps = level - 1
+            sides = int(player.getHitDie()[1:])
+            con = player.getMod("Constitution")
+            self.assertEqual(player.getLevel(), level)
+            self.assertGreaterEqual(player.getHitpoints() - hp,
+                                    steps * (1 + con))
+            self.assertLessEqual(player.getHitpoints() - hp,
+                                 steps * (sides + con))
+
+    def test_errors(self):
+        batch = rbt.CharacterBatch.from_characters(self.players)
+        top = max(rs.role_progression(r).maxLevel for r in rs.rules.Roles)
+        with self.assertRaises(ValueError):
+            batch.level_to(top + 1)
+        batch.level_to(self.levels)
+        with self.assertRaises(ValueError):
+            batch.level_to(1)
+        self.assertEqual(batch.level.tolist(), self.levels)
+
+
+if __name__ == '__main__':
+    unittest.main()
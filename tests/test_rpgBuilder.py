@@ -0,0 +1,52 @@
+# -*- coding: utf-8 -*-
+"""
+Tests for rpgBuilder, and regenerating seeded characters with rpgSave.
+
+@author: auto-nom
+"""
+
+import os
+import sys
+import tempfile
+import unittest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import rpgBuilder as rb
+import rpgDice as rd
+import rpgSave as rsv
+
+
+class RandomGenManyTest(unittest.TestCase):
+
+    def test_same_seed(self):
+        """ The same seed and workers always give the same characters."""
+        first = rb.random_gen_many(20, rd.DiceRNG(7), workers=1)
+        second = rb.random_gen_many(20, rd.DiceRNG(7), workers=1)
+        self.assertEqual([p.getCharDict() for p in first],
+                         [p.getCharDict() for p in second])
+        other = rb.random_gen_many(20, rd.DiceRNG(8), workers=1)
+        self.assertNotEqual([p.getCharDict() for p in first],
+                            [p.getCharDict() for p in other])
+
+
+class SeededCharacterTest(unittest.TestCase):
+
+    def test_save_and_load(self):
+        """ Seeded characters come back the same, edits and all."""
+        players = [rsv.SeededCharacter(seed) for seed in range(5)]
+        players[1].setName("Bob")
+        players[2].setXP(300)
+        players[2].level_up(rd.DiceRNG(1))
+        with tempfile.TemporaryDirectory() as directory:
+            filename = os.path.join(directory, "seeds.jsonl")
+            rsv.save_seeded(players, filename)
+            loaded = rsv.load_seeded(filename)
+        self.assertEqual(loaded[0].getRecord()["Overrides"], {})
+        self.assertEqual(loaded[1].getRecord()["Overrides"], {"Name": "Bob"})
+        self.assertEqual([p.getCharDict() for p in loaded],
+                         [p.getCharDict() for p in players])
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,70 @@
+# -*- coding: utf-8 -*-
+"""
+Tests for rpgJournal.
+
+@author: auto-nom
+"""
+
+import os
+import sys
+import tempfile
+import unittest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import rpgBuilder as rb
+import rpgDice as rd
+import rpgJournal as rj
+
+
+class CharacterJournalTest(unittest.TestCase):
+
+    def setUp(self):
+        self.dir = tempfile.TemporaryDirectory()
+        self.filename = os.path.join(self.dir.name, "char.journal")
+
+    def tearDown(self):
+        self.dir.cleanup()
+
+    def test_history(self):
+        """ Undo and redo over snapshots, carried on through a save."""
+        player = rb.random_gen(rd.DiceRNG(1))
+        journal = rj.CharacterJournal(player, snapshotEvery=4)
+        # More edits than snapshotEvery, so undo has to replay snapshots
+        for xp in range(1, 11):
+            player.setXP(xp)
+            self.assertTrue(journal.record(player))
+        self.assertFalse(journal.record(player))
+        self.assertGreater(len(journal.snapshots), 1)
+
+        self.assertEqual(journal.undo().getXP(), 9)
+        self.assertEqual(journal.undo().getXP(), 8)
+        self.assertEqual(journal.redo().getXP(), 9)
+        self.assertTrue(journal.canRedo())
+
+        player = journal.character()
+        name = player.getName()
+        player.setName("Bob")
+        journal.record(player)
+        # A new edit drops what could be redone
+        self.assertFalse(journal.canRedo())
+        journal.save(self.filename)
+
+        loaded = rj.load_journal(self.filename, snapshotEvery=4)
+        self.assertEqual(loaded.state, journal.state)
+        self.assertEqual(loaded.character().getName(), "Bob")
+
+        # The undo history carries on after loading, and saving again only
+        # appends what is new
+        self.assertEqual(loaded.undo().getName(), name)
+        self.assertEqual(loaded.undo().getXP(), 8)
+        loaded.save(self.filename)
+        reloaded = rj.load_journal(self.filename, snapshotEvery=4)
+        self.assertEqual(reloaded.state, loaded.state)
+        self.assertEqual(reloaded.redo().getXP(), 9)
+        self.assertEqual(reloaded.redo().getName(), "Bob")
+        self.assertFalse(reloaded.canRedo())
+
+
+if __name__ == '__main__':
+    unittest.main()
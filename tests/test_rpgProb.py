@@ -0,0 +1,81 @@
+# -*- coding: utf-8 -*-
+"""
+Tests for rpgProb.
+
+@author: auto-nom
+"""
+
+import os
+import sys
+import unittest
+from fractions import Fraction
+from itertools import product
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import rpgDice as rd
+import rpgProb as rp
+import rpgSystem as rs
+
+
+def brute_force(sides, num, keep, lowest):
+    """ Distribution of keeping dice, by going through every roll."""
+    sums = {}
+    for roll in product(range(1, sides + 1), repeat=num):
+        total = sum(sorted(roll, reverse=not lowest)[:keep])
+        sums[total] = sums.get(total, 0) + 1
+    low = min(sums)
+    return rp.Distribution(low, [sums.get(s, 0)
+                                 for s in range(low, max(sums) + 1)])
+
+
+class KeepDistTest(unittest.TestCase):
+
+    def test_against_brute_force(self):
+        """ Keeping dice matches counting every roll exactly."""
+        for text, sides, num, keep, lowest in (("4d6kh3", 6, 4, 3, False),
+                                               ("2d20kl1", 20, 2, 1, True),
+                                               ("4d6dh2", 6, 4, 2, True),
+                                               ("5d4kh2", 4, 5, 2, False)):
+            with self.subTest(text):
+                self.assertEqual(rd.compile_roll(text).distribution(),
+                                 brute_force(sides, num, keep, lowest))
+
+
+class PercentileTest(unittest.TestCase):
+
+    def test_percentile(self):
+        dist = rp.dice_dist(6, 4, keep=3)
+        self.assertEqual(dist.percentile(0), 3)
+        self.assertEqual(dist.percentile(1), 18)
+        self.assertEqual(dist.median(), 12)
+        self.assertEqual(dist.percentile(Fraction(1, 2)), dist.median())
+        # Percentiles are chances, not out of 100
+        with self.assertRaises(ValueError):
+            dist.percentile(50)
+
+
+class LevelHpDistTest(unittest.TestCase):
+
+    def tearDown(self):
+        # Put back the formulas from the data files
+        rs.rules.load()
+
+    def test_default_formulas(self):
+        d10 = rp.dice_dist(10)
+        self.assertEqual(rp.level_hp_dist("D10", 3, 10, 2),
+                         rp.constant(12) + (d10 + 2) + (d10 + 2))
+
+    def test_formula_with_level(self):
+        """ Homebrew formulas are used, with each level's values."""
+        rs.rules.Formulas["Level Hitpoints"] = rs.Formula(
+            "Level Hitpoints", "HitDie + Level + ProficiencyBonus")
+        bonus = rs.role_progression("Fighter").proficiencyBonus
+        d8 = rp.dice_dist(8)
+        self.assertEqual(rp.level_hp_dist(8, 3, 10, 0, role="Fighter"),
+                         rp.constant(10) + (d8 + 2 + bonus[2]) +
+                         (d8 + 3 + bonus[3]))
+
+
+if __name__ == '__main__':
+    unittest.main()
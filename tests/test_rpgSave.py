@@ -0,0 +1,102 @@
+# -*- coding: utf-8 -*-
+"""
+Tests for rpgSave.
+
+@author: auto-nom
+"""
+
+import os
+import sys
+import tempfile
+import unittest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import rpgBuilder as rb
+import rpgDice as rd
+import rpgSave as rsv
+
+
+class DeltaSaveTest(unittest.TestCase):
+
+    def setUp(self):
+        self.dir = tempfile.TemporaryDirectory()
+        self.filename = os.path.join(self.dir.name, "char.delta")
+        self.player = rb.random_gen(rd.DiceRNG(1))
+
+    def tearDown(self):
+        self.dir.cleanup()
+
+    def test_save_after_crash(self):
+        """ A save after a crash mid-write isn't lost, and can be loaded."""
+        delta = rsv.DeltaSave(self.filename)
+        delta.save(self.player)
+        self.player.setXP(10)
+        delta.save(self.player)
+        # A crash part way through writing the next patch
+        with open(self.filename, 'a') as f:
+            f.write('{"Set":{"XP":2')
+        self.assertEqual(rsv.load_delta(self.filename).getXP(), 10)
+
+        delta = rsv.DeltaSave(self.filename)
+        self.player.setXP(99)
+        delta.save(self.player)
+        self.assertEqual(rsv.load_delta(self.filename).getXP(), 99)
+
+        self.player.setXP(100)
+        delta.save(self.player)
+        self.assertEqual(rsv.load_delta(self.filename).getCharDict(),
+                         self.player.getCharDict())
+
+
+class BinarySaveTest(unittest.TestCase):
+
+    def setUp(self):
+        self.dir = tempfile.TemporaryDirectory()
+        self.filename = os.path.join(self.dir.name, "roster.bin")
+
+    def tearDown(self):
+        self.dir.cleanup()
+
+    def roster(self):
+        """ Generated characters, and ones edited away from their rules."""
+        players = [rb.random_gen(rd.DiceRNG(i)) for i in range(6)]
+        players[1].setName("Bob the Renamed")
+        players[2].setEquipment(players[2].getEquipment() + ["Rubber chicken"])
+        # Past the end of its role's table of levels
+        players[3].setLevel(25)
+        players[4].setAttrib("Luck", 14)
+        return players
+
+    def test_round_trip(self):
+        """ Every character comes back exactly as it was saved."""
+        players = self.roster()
+        self.assertEqual(rsv.save_binary(players, self.filename), len(players))
+        loaded = rsv.load_binary(self.filename)
+        self.assertEqual([p.getCharDict() for p in loaded],
+                         [p.getCharDict() for p in players])
+
+    def rewrite_header(self, version=rsv.BINARY_VERSION, checksum=None):
+        """ Save a roster, then change the version or checksum saved."""
+        rsv.save_binary(self.roster(), self.filename)
+        with open(self.filename, 'r+b') as f:
+            magic, oldVersion, oldChecksum = rsv._HEADER.unpack(
+                f.read(rsv._HEADER.size))
+            f.seek(0)
+            f.write(rsv._HEADER.pack(magic, version,
+                                     oldChecksum if checksum is None
+                                     else checksum))
+
+    def test_wrong_version(self):
+        self.rewrite_header(version=rsv.BINARY_VERSION + 1)
+        with self.assertRaises(ValueError):
+            rsv.load_binary(self.filename)
+
+    def test_wrong_checksum(self):
+        self.rewrite_header(checksum=rsv._binary_tables()["checksum"] ^ 1)
+        with self.assertRaises(ValueError):
+            rsv.load_binary(self.filename)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,62 @@
+# -*- coding: utf-8 -*-
+"""
+Tests for rpgStore.
+
+@author: auto-nom
+"""
+
+import os
+import sqlite3
+import sys
+import tempfile
+import unittest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import rpgBuilder as rb
+import rpgDice as rd
+import rpgStore as rst
+
+
+class CharacterStoreTest(unittest.TestCase):
+
+    def setUp(self):
+        self.store = rst.CharacterStore()
+        self.player = rb.random_gen(rd.DiceRNG(1))
+        self.charId = self.store.add(self.player)
+
+    def tearDown(self):
+        self.store.close()
+
+    def test_getters_follow_changes(self):
+        """ Once loaded, a StoredCharacter's getters show changes to it."""
+        stored = next(self.store.query())
+        self.assertEqual(stored.getName(), self.player.getName())
+        stored.setName("Bob")
+        self.assertEqual(stored.getName(), "Bob")
+        self.assertEqual(stored.getCharDict()["Name"], "Bob")
+        stored.level_up()
+        self.assertEqual(stored.name, "Bob")
+        self.assertEqual(stored.lvl, 2)
+
+    def test_query_checks_attributes(self):
+        """ An unknown attribute is an error straight away."""
+        with self.assertRaises(KeyError):
+            self.store.query(Luck=10)
+
+    def test_open_other_database(self):
+        """ Opening a database that isn't a store leaves it alone."""
+        with tempfile.TemporaryDirectory() as directory:
+            filename = os.path.join(directory, "other.db")
+            db = sqlite3.connect(filename)
+            with db:
+                db.execute("CREATE TABLE things (x)")
+            with self.assertRaises(ValueError):
+                rst.CharacterStore(filename, create=False)
+            tables = db.execute("SELECT name FROM sqlite_master").fetchall()
+            db.close()
+            self.assertEqual(tables, [("things",)])
+
+
+if __name__ == '__main__':
+    unittest.main()
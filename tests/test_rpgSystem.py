@@ -0,0 +1,76 @@
+# -*- coding: utf-8 -*-
+"""
+Tests for rpgSystem.
+
+@author: auto-nom
+"""
+
+import os
+import sys
+import unittest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import rpgBuilder as rb
+import rpgDice as rd
+import rpgSystem as rs
+
+
+class LevelToTest(unittest.TestCase):
+
+    def tearDown(self):
+        # Put back the formulas from the data files
+        rs.rules.load()
+
+    def test_level_formula(self):
+        """ level_to matches level_up with formulas that use the level."""
+        rules = rs.rules
+        rules.Formulas["Level Hitpoints"] = rs.Formula(
+            "Level Hitpoints", "HitDie + Level + ProficiencyBonus")
+        rules.Formulas["AC"] = rs.Formula("AC", "10 + Dexterity_mod + Level")
+        rules.ACDepends = rules._depends(rules.Formulas["AC"])
+
+        leveled = rb.random_gen(rd.DiceRNG(4))
+        leveled.level_to(7, rd.DiceRNG(1))
+        stepped = rb.random_gen(rd.DiceRNG(4))
+        rng = rd.DiceRNG(1)
+        for _ in range(6):
+            stepped.level_up(rng)
+        self.assertEqual(leveled.getCharDict(), stepped.getCharDict())
+        self.assertEqual(leveled.getAC(), 10 + leveled.getMod("Dexterity") + 7)
+
+
+class ViewTest(unittest.TestCase):
+
+    def test_views_follow_changes(self):
+        """ Views of scores, modifiers and skills show later changes."""
+        player = rb.random_gen(rd.DiceRNG(4))
+        attribs = player.getAttribDict(view=True)
+        mods = player.getModDict(view=True)
+        skills = player.getSkillDict(view=True)
+        player.setAttrib("Dexterity", 8)
+        self.assertEqual(attribs["Dexterity"], 8)
+        self.assertEqual(mods["Dexterity_mod"], -1)
+        self.assertEqual(skills["Stealth"], -1)
+        self.assertEqual(dict(mods), player.getModDict())
+        self.assertEqual(dict(skills), player.getSkillDict())
+
+
+class SetAttribTest(unittest.TestCase):
+
+    def test_scores(self):
+        """ Whole number scores are kept, anything else is a ValueError."""
+        player = rb.random_gen(rd.DiceRNG(4))
+        player.setAttrib("Strength", 16.0)
+        self.assertEqual(player.getAttrib("Strength"), 16)
+        for score in (99999, 15.5, "15"):
+            with self.assertRaisesRegex(ValueError, "Strength"):
+                player.setAttrib("Strength", score)
+        charDict = player.getCharDict()
+        charDict["Attributes"]["Strength"] = 99999
+        with self.assertRaisesRegex(ValueError, "Strength"):
+            rs.Character.from_dict(charDict)
+
+
+if __name__ == '__main__':
+    unittest.main()